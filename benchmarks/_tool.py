@@ -0,0 +1,24 @@
+"""benchmarks 共用：載入主程式（檔名含中文與連字號，無法直接 import）"""
+import importlib.util
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+MODULE_NAME = "textfix_tool"
+
+
+def tool_path() -> Path:
+    matches = sorted(ROOT.glob("文字亂碼修復工具*.py"))
+    if not matches:
+        raise FileNotFoundError(f"找不到主程式：{ROOT}/文字亂碼修復工具*.py")
+    return matches[0]
+
+
+def load_tool():
+    if MODULE_NAME in sys.modules:
+        return sys.modules[MODULE_NAME]
+    spec = importlib.util.spec_from_file_location(MODULE_NAME, tool_path())
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[MODULE_NAME] = mod
+    spec.loader.exec_module(mod)
+    return mod
@@ -0,0 +1,87 @@
+"""冷啟動基準：純文字、不翻譯的命令列路徑。
+
+每次都開新的 Python 行程修一個小 .txt，量整體牆鐘時間；另外在單一行程內確認
+處理完文字檔後沒有載入 tkinter / openpyxl / docx / opencc / deep_translator。
+
+    python benchmarks/bench_startup.py                  # 印出一行 JSON
+    python benchmarks/bench_startup.py --out startup.jsonl --max-median 0.5
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from _tool import tool_path  # noqa: E402
+
+HEAVY_MODULES = ["tkinter", "openpyxl", "docx", "opencc", "deep_translator"]
+
+PROBE = r"""
+import json, sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, {bench_dir!r})
+from _tool import load_tool
+tool = load_tool()
+t1 = time.perf_counter()
+from pathlib import Path
+tool.process_one(Path({src!r}), "auto", "none")
+t2 = time.perf_counter()
+print(json.dumps({{"import_s": t1 - t0, "process_s": t2 - t1,
+                  "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--runs", type=int, default=10, help="冷啟動次數（預設 10）")
+    parser.add_argument("--out", help="把結果附加到此 JSONL 檔（方便長期追蹤）")
+    parser.add_argument("--max-median", type=float, help="中位數超過此秒數時以結束碼 1 結束")
+    args = parser.parse_args()
+
+    tool = str(tool_path())
+    with tempfile.TemporaryDirectory() as tmp:
+        src = Path(tmp) / "sample.txt"
+        src.write_bytes(("你好，世界！這是冷啟動測試。\n" * 50).encode("gbk"))
+        cmd = [sys.executable, tool, str(src), "-j", "1", "--report", os.devnull]
+        times = []
+        for _ in range(args.runs):
+            t0 = time.perf_counter()
+            subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            times.append(time.perf_counter() - t0)
+        probe = PROBE.format(bench_dir=str(Path(__file__).resolve().parent), src=str(src), heavy=HEAVY_MODULES)
+        out = subprocess.run([sys.executable, "-c", probe], check=True, capture_output=True, text=True)
+        detail = json.loads(out.stdout.strip().splitlines()[-1])
+
+    result = {
+        "benchmark": "startup_text_cli",
+        "runs": args.runs,
+        "median_s": round(statistics.median(times), 4),
+        "min_s": round(min(times), 4),
+        "max_s": round(max(times), 4),
+        "module_import_s": round(detail["import_s"], 4),
+        "optional_modules_loaded": detail["loaded"],
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": int(time.time()),
+    }
+    line = json.dumps(result, ensure_ascii=False)
+    print(line)
+    if args.out:
+        with open(args.out, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    if detail["loaded"]:
+        print(f"文字路徑不應載入：{', '.join(detail['loaded'])}", file=sys.stderr)
+        return 1
+    if args.max_median is not None and result["median_s"] > args.max_median:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
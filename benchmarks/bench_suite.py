@@ -0,0 +1,216 @@
+"""效能與正確率基準：以 corpus.py 的合成亂碼語料量測
+decode_bytes_best（MB/s）、transform_string（cells/s，長字串另以 MB/s）、
+repair_xlsx_to_new_file（cells/s）、repair_docx_to_new_file（runs/s）的吞吐量、
+tracemalloc 峰值記憶體與還原正確率（輸出與乾淨原文完全相同的比例）。
+
+    python benchmarks/bench_suite.py                         # 印出結果 JSON
+    python benchmarks/bench_suite.py --quick --save base.json
+    python benchmarks/bench_suite.py --compare base.json     # 變慢超過容忍度或正確率下降時結束碼 1
+"""
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import corpus  # noqa: E402
+from _tool import load_tool  # noqa: E402
+
+QUICK = {"text": [64 * 1024], "cells": [1000], "xlsx": [1000], "docx": [500], "repeat": 1}
+FULL = {"text": corpus.TEXT_SIZES, "cells": [5000], "xlsx": corpus.XLSX_CELLS, "docx": corpus.DOCX_RUNS, "repeat": 3}
+
+
+def measure(fn: Callable[[], Any], repeat: int, setup: Callable[[], None] = lambda: None) -> Tuple[float, int, Any]:
+    """(最佳秒數, 峰值位元組, 最後一次結果)；計時與量記憶體分開跑，tracemalloc 的額外負擔不算進時間"""
+    best = float("inf")
+    result = None
+    for _ in range(max(1, repeat)):
+        setup()
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    setup()
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best, peak, result
+
+
+def _entry(function: str, amount: float, unit: str, seconds: float, peak: int, correct: int, total: int) -> Dict:
+    return {"function": function, "throughput": round(amount / seconds, 3) if seconds > 0 else None,
+            "unit": unit, "seconds": round(seconds, 5), "peak_kb": round(peak / 1024, 1),
+            "accuracy": round(correct / total, 4) if total else None, "n": total}
+
+
+def bench_decode(tool, sizes: List[int], repeat: int, results: Dict):
+    for size in sizes:
+        for case in corpus.all_cases(size, tool):
+            if case.kind != "bytes":
+                continue
+            secs, peak, (text, _) = measure(lambda: tool.decode_bytes_best(case.data, case.mode), repeat)
+            results[f"decode_bytes_best/{case.lang}/{case.codec}/{size}"] = _entry(
+                "decode_bytes_best", len(case.data) / 1e6, "MB/s", secs, peak, int(text == case.clean), 1)
+
+
+def bench_transform(tool, sizes: List[int], cells: List[int], repeat: int, results: Dict):
+    clear = tool._TRANSFORM_CACHE.clear
+    for n in cells:
+        for lang, mode in corpus.LANG_MODES.items():
+            rows = corpus.cell_cases(lang, n, tool)
+            bads = [r[2] for r in rows]
+            secs, peak, fixed = measure(lambda: [tool.transform_string(b, mode) for b in bads], repeat, clear)
+            hits: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+            for (codec, clean, _), out in zip(rows, fixed):
+                hits[codec][0] += int(out == clean)
+                hits[codec][1] += 1
+            entry = _entry("transform_string", len(rows), "cells/s", secs, peak,
+                           sum(h[0] for h in hits.values()), len(rows))
+            entry["accuracy_by_pair"] = {k: round(c / t, 4) for k, (c, t) in sorted(hits.items())}
+            results[f"transform_string/{lang}/{n}"] = entry
+    # 整段長字串（不進快取，直接走逆轉引擎）
+    for size in sizes:
+        for case in corpus.all_cases(size, tool):
+            if case.kind != "mojibake":
+                continue
+            secs, peak, out = measure(lambda: tool.transform_string(case.data, case.mode), repeat, clear)
+            results[f"transform_string_long/{case.lang}/{case.codec}/{size}"] = _entry(
+                "transform_string_long", len(case.data.encode("utf-8", "surrogatepass")) / 1e6, "MB/s",
+                secs, peak, int(out == case.clean), 1)
+
+
+def _read_xlsx_column(tool, path: Path) -> List[Any]:
+    wb = tool.get_openpyxl().load_workbook(path, read_only=True)
+    try:
+        return [row[0] for row in wb.worksheets[0].iter_rows(values_only=True)]
+    finally:
+        wb.close()
+
+
+def bench_xlsx(tool, counts: List[int], repeat: int, results: Dict, tmp: Path):
+    if tool.get_openpyxl() is None:
+        results["repair_xlsx_to_new_file"] = {"function": "repair_xlsx_to_new_file", "skipped": "openpyxl 未安裝"}
+        return
+    for n in counts:
+        for lang, mode in corpus.LANG_MODES.items():
+            src = tmp / f"{lang}_{n}.xlsx"
+            meta = corpus.write_xlsx_fixture(src, lang, n, tool)
+            out = tmp / f"{lang}_{n}_out.xlsx"
+            secs, peak, (ok, tag, _) = measure(
+                lambda: tool.repair_xlsx_to_new_file(src, mode, "none", out), repeat, tool._TRANSFORM_CACHE.clear)
+            got = _read_xlsx_column(tool, out) if ok else []
+            correct = sum(1 for a, b in zip(got, meta["clean"]) if a == b)
+            results[f"repair_xlsx_to_new_file/{lang}/{n}"] = _entry(
+                "repair_xlsx_to_new_file", meta["cells"], "cells/s", secs, peak, correct, meta["cells"])
+
+
+def bench_docx(tool, counts: List[int], repeat: int, results: Dict, tmp: Path):
+    docx = tool.get_docx()
+    if docx is None:
+        results["repair_docx_to_new_file"] = {"function": "repair_docx_to_new_file", "skipped": "python-docx 未安裝"}
+        return
+    for n in counts:
+        for lang, mode in corpus.LANG_MODES.items():
+            src = tmp / f"{lang}_{n}.docx"
+            meta = corpus.write_docx_fixture(src, lang, n, tool)
+            out = tmp / f"{lang}_{n}_out.docx"
+            secs, peak, (ok, tag, _) = measure(
+                lambda: tool.repair_docx_to_new_file(src, mode, "none", out), repeat, tool._TRANSFORM_CACHE.clear)
+            got = [p.text for p in docx.Document(str(out)).paragraphs] if ok else []
+            correct = sum(1 for a, b in zip(got, meta["clean"]) if a == b)
+            results[f"repair_docx_to_new_file/{lang}/{n}"] = _entry(
+                "repair_docx_to_new_file", meta["runs"], "runs/s", secs, peak, correct, meta["runs"])
+
+
+def summarize(results: Dict) -> Dict:
+    """各函式合計：吞吐量 = 總量 / 總秒數，正確率 = 總正確數 / 總案例數"""
+    acc: Dict[str, Dict[str, float]] = {}
+    for entry in results.values():
+        if "skipped" in entry or not entry.get("seconds"):
+            continue
+        s = acc.setdefault(entry["function"], {"amount": 0.0, "seconds": 0.0, "correct": 0.0, "n": 0,
+                                               "unit": entry["unit"], "peak_kb": 0.0})
+        s["amount"] += entry["throughput"] * entry["seconds"]
+        s["seconds"] += entry["seconds"]
+        s["correct"] += entry["accuracy"] * entry["n"]
+        s["n"] += entry["n"]
+        s["peak_kb"] = max(s["peak_kb"], entry["peak_kb"])
+    return {name: {"throughput": round(s["amount"] / s["seconds"], 3), "unit": s["unit"],
+                   "accuracy": round(s["correct"] / s["n"], 4), "max_peak_kb": s["peak_kb"], "n": s["n"]}
+            for name, s in sorted(acc.items())}
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """逐項比對：吞吐量低於基準 (1 - tolerance) 倍、峰值記憶體高於 (1 + tolerance) 倍（且多 1 MB 以上）、
+    或正確率下降，都列為退步。只比兩邊都有的項目"""
+    problems = []
+    for key, base in baseline.get("results", {}).items():
+        cur = current["results"].get(key)
+        if cur is None or "skipped" in cur or "skipped" in base:
+            continue
+        if base.get("accuracy") is not None and cur.get("accuracy") is not None \
+                and cur["accuracy"] + 1e-9 < base["accuracy"]:
+            problems.append(f"{key}: 正確率 {base['accuracy']} -> {cur['accuracy']}")
+        if base.get("throughput") and cur.get("throughput") \
+                and cur["throughput"] < base["throughput"] * (1 - tolerance):
+            problems.append(f"{key}: 吞吐量 {base['throughput']} -> {cur['throughput']} {cur['unit']}")
+        if cur["peak_kb"] > base["peak_kb"] * (1 + tolerance) and cur["peak_kb"] - base["peak_kb"] > 1024:
+            problems.append(f"{key}: 峰值記憶體 {base['peak_kb']} -> {cur['peak_kb']} KB")
+    return problems
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="只跑最小尺寸、各一次（CI 用）")
+    parser.add_argument("--only", action="append", default=[],
+                        choices=["decode", "transform", "xlsx", "docx"], help="只跑指定項目（可重複）")
+    parser.add_argument("--save", metavar="PATH", help="把結果寫成 JSON 基準檔")
+    parser.add_argument("--compare", metavar="PATH", help="與此基準檔比對")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="吞吐量/記憶體容許的相對退步（預設 0.2）")
+    args = parser.parse_args()
+
+    tool = load_tool()
+    tool.set_progress_hook(None)
+    cfg = QUICK if args.quick else FULL
+    only = set(args.only) or {"decode", "transform", "xlsx", "docx"}
+    results: Dict[str, Dict] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        if "decode" in only:
+            bench_decode(tool, cfg["text"], cfg["repeat"], results)
+        if "transform" in only:
+            bench_transform(tool, cfg["text"], cfg["cells"], cfg["repeat"], results)
+        if "xlsx" in only:
+            bench_xlsx(tool, cfg["xlsx"], cfg["repeat"], results, Path(tmp))
+        if "docx" in only:
+            bench_docx(tool, cfg["docx"], cfg["repeat"], results, Path(tmp))
+    report = {
+        "benchmark": "suite",
+        "config": {"quick": args.quick, "only": sorted(only), **{k: v for k, v in cfg.items()}},
+        "summary": summarize(results),
+        "results": results,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": int(time.time()),
+    }
+    if args.save:
+        Path(args.save).write_text(json.dumps(report, ensure_ascii=False, indent=1), encoding="utf-8")
+    print(json.dumps(report["summary"], ensure_ascii=False, indent=1))
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        problems = compare(report, baseline, args.tolerance)
+        for p in problems:
+            print(p, file=sys.stderr)
+        return 1 if problems else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+"""合成亂碼語料：乾淨的簡中/繁中/日文/英文句子，依主程式的 pairs_for_mode / enc_candidates_for_mode
+做成亂碼，並輸出文字檔、XLSX、DOCX 測試檔。內容以固定亂數種子產生，每次結果相同。
+
+    python benchmarks/corpus.py out_dir            # 產生預設大小的測試檔，印出清單 JSON
+"""
+import argparse
+import json
+import random
+import sys
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from _tool import load_tool  # noqa: E402
+
+SENTENCES: Dict[str, List[str]] = {
+    "zh-Hans": [
+        "这是一份用来测试乱码修复的中文文件。",
+        "请在下午三点前把报表寄给财务部门。",
+        "产品名称、规格与价格如下表所示。",
+        "系统会自动检测编码并输出为统一格式。",
+        "如有任何问题，欢迎随时与我们联系。",
+        "本月销售额较上月增长百分之十二。",
+        "会议记录已经上传到共享文件夹。",
+        "仓库库存不足，需要尽快补货。",
+    ],
+    "zh-Hant": [
+        "這是一份用來測試亂碼修復的中文文件。",
+        "請在下午三點前把報表寄給財務部門。",
+        "產品名稱、規格與價格如下表所示。",
+        "系統會自動偵測編碼並輸出為統一格式。",
+        "如有任何問題，歡迎隨時與我們聯繫。",
+        "本月銷售額較上月成長百分之十二。",
+        "會議紀錄已經上傳到共用資料夾。",
+        "倉庫庫存不足，需要盡快補貨。",
+    ],
+    "ja": [
+        "これは文字化けの修復をテストするための文書です。",
+        "午後三時までに報告書を経理部へ送ってください。",
+        "製品名、仕様、価格は下の表のとおりです。",
+        "システムは文字コードを自動判定して統一形式で出力します。",
+        "ご不明な点がございましたら、お気軽にお問い合わせください。",
+        "今月の売上は先月より十二パーセント増加しました。",
+        "議事録は共有フォルダーにアップロード済みです。",
+        "在庫が不足しているため、早急に補充が必要です。",
+    ],
+    "en": [
+        "This document is used to test mojibake repair.",
+        "Please send the report to the finance team by 3 p.m.",
+        "Product names, specifications and prices are listed below.",
+        "The café on Rue Saint-Honoré serves crème brûlée.",
+        "Our naïve résumé parser mishandled the “smart quotes”.",
+        "Sales rose 12% over last month — a record.",
+        "Meeting notes have been uploaded to the shared folder.",
+        "Stock is running low; please reorder soon.",
+    ],
+}
+
+# 語料語言 -> 主程式的來源語言模式
+LANG_MODES = {"zh-Hans": "zh-simp", "zh-Hant": "zh-trad", "ja": "ja", "en": "en"}
+
+# 預設測試檔大小：文字檔位元組數、XLSX 儲存格數、DOCX run 數
+TEXT_SIZES = [64 * 1024, 1024 * 1024]
+XLSX_CELLS = [1000, 10000]
+DOCX_RUNS = [500, 5000]
+
+
+class Case(NamedTuple):
+    lang: str
+    mode: str
+    kind: str          # "bytes"（以 enc 存檔，考 decode_bytes_best）或 "mojibake"（以 right 編碼、wrong 解碼）
+    codec: str         # bytes：enc；mojibake："wrong>right"
+    clean: str
+    data: object       # bytes：bytes；mojibake：亂碼字串
+
+
+def make_text(lang: str, size: int, seed: int = 0, sep: str = "\n") -> str:
+    """隨機串接句子，直到約 size 個字元"""
+    rng = random.Random(f"{lang}:{size}:{seed}")
+    pool = SENTENCES[lang]
+    parts: List[str] = []
+    n = 0
+    while n < size:
+        s = rng.choice(pool)
+        parts.append(s)
+        n += len(s) + len(sep)
+    return sep.join(parts) + sep
+
+
+def _xml_safe(s: str) -> bool:
+    # XLSX/DOCX 不接受 \t\n\r 以外的 C0 控制字元
+    return not any(ord(ch) < 32 and ch not in "\t\n\r" for ch in s)
+
+
+def garble(clean: str, wrong: str, right: str) -> Optional[str]:
+    """模擬「以 right 存檔、被當成 wrong 讀取」；無法編碼或解碼就回 None"""
+    try:
+        return clean.encode(right).decode(wrong)
+    except (UnicodeEncodeError, UnicodeDecodeError):
+        return None
+
+
+def cases(lang: str, clean: str, tool=None) -> Iterator[Case]:
+    """一段乾淨文字在該語言模式下的所有測試案例"""
+    tool = tool or load_tool()
+    mode = LANG_MODES[lang]
+    for enc in tool.enc_candidates_for_mode(mode):
+        try:
+            yield Case(lang, mode, "bytes", enc, clean, clean.encode(enc))
+        except UnicodeEncodeError:
+            continue
+    for wrong, right in tool.pairs_for_mode(mode):
+        bad = garble(clean, wrong, right)
+        if bad is not None and bad != clean:
+            yield Case(lang, mode, "mojibake", f"{wrong}>{right}", clean, bad)
+
+
+def all_cases(size: int, tool=None) -> Iterator[Case]:
+    tool = tool or load_tool()
+    for lang in SENTENCES:
+        yield from cases(lang, make_text(lang, size), tool)
+
+
+def cell_cases(lang: str, count: int, tool=None) -> List[Tuple[str, str, str]]:
+    """(codec, 乾淨字串, 亂碼字串) × count，輪流使用該模式的每個逆轉對；作為儲存格/run 內容"""
+    tool = tool or load_tool()
+    mode = LANG_MODES[lang]
+    pairs = tool.pairs_for_mode(mode)
+    rng = random.Random(f"cells:{lang}:{count}")
+    out: List[Tuple[str, str, str]] = []
+    attempts = 0
+    while len(out) < count and attempts < count * 20:
+        attempts += 1
+        wrong, right = pairs[attempts % len(pairs)]
+        clean = rng.choice(SENTENCES[lang])
+        bad = garble(clean, wrong, right)
+        if bad is not None and bad != clean and _xml_safe(bad):
+            out.append((f"{wrong}>{right}", clean, bad))
+    return out
+
+
+def write_text_fixtures(out_dir: Path, sizes: List[int] = TEXT_SIZES, tool=None) -> List[Dict]:
+    """每種語言 × 候選編碼 × 大小各一個文字檔"""
+    tool = tool or load_tool()
+    out_dir.mkdir(parents=True, exist_ok=True)
+    made = []
+    for size in sizes:
+        for lang in SENTENCES:
+            clean = make_text(lang, size)
+            for case in cases(lang, clean, tool):
+                if case.kind != "bytes":
+                    continue
+                path = out_dir / f"{lang}_{case.codec}_{size}.txt"
+                path.write_bytes(case.data)
+                made.append({"path": str(path), "lang": lang, "mode": case.mode, "codec": case.codec,
+                             "bytes": len(case.data), "clean": clean})
+    return made
+
+
+def write_xlsx_fixture(path: Path, lang: str, count: int, tool=None) -> Optional[Dict]:
+    """一欄亂碼、每列一格；回傳對照用的乾淨內容。未安裝 openpyxl 時回 None"""
+    tool = tool or load_tool()
+    openpyxl = tool.get_openpyxl()
+    if openpyxl is None:
+        return None
+    rows = cell_cases(lang, count, tool)
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    for _, _, bad in rows:
+        ws.append([bad])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    wb.save(path)
+    return {"path": str(path), "lang": lang, "mode": LANG_MODES[lang], "cells": len(rows),
+            "codecs": [r[0] for r in rows], "clean": [r[1] for r in rows]}
+
+
+def write_docx_fixture(path: Path, lang: str, count: int, tool=None) -> Optional[Dict]:
+    """每段一個 run；回傳對照用的乾淨內容。未安裝 python-docx 時回 None"""
+    tool = tool or load_tool()
+    docx = tool.get_docx()
+    if docx is None:
+        return None
+    rows = cell_cases(lang, count, tool)
+    document = docx.Document()
+    for _, _, bad in rows:
+        document.add_paragraph().add_run(bad)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    document.save(str(path))
+    return {"path": str(path), "lang": lang, "mode": LANG_MODES[lang], "runs": len(rows),
+            "codecs": [r[0] for r in rows], "clean": [r[1] for r in rows]}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("out_dir", help="測試檔輸出資料夾")
+    args = parser.parse_args()
+    out_dir = Path(args.out_dir)
+    made = [{k: v for k, v in m.items() if k != "clean"} for m in write_text_fixtures(out_dir / "text")]
+    for lang in SENTENCES:
+        for n in XLSX_CELLS:
+            m = write_xlsx_fixture(out_dir / "xlsx" / f"{lang}_{n}.xlsx", lang, n)
+            if m:
+                made.append({"path": m["path"], "lang": lang, "cells": m["cells"]})
+        for n in DOCX_RUNS:
+            m = write_docx_fixture(out_dir / "docx" / f"{lang}_{n}.docx", lang, n)
+            if m:
+                made.append({"path": m["path"], "lang": lang, "runs": m["runs"]})
+    print(json.dumps(made, ensure_ascii=False, indent=1))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""run_batch 取消：行程池模式下，取消後不可再產生新的 _fixed 輸出"""
+import queue
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+import corpus  # noqa: E402
+from _tool import load_tool  # noqa: E402
+
+tool = load_tool()
+tool.set_progress_hook(None)
+
+
+def _make_inputs(folder: Path, count: int, chars: int):
+    text = corpus.make_text("zh-Hans", chars).encode("gbk")
+    paths = []
+    for i in range(count):
+        p = folder / f"f{i:02d}.txt"
+        p.write_bytes(text)
+        paths.append(p)
+    return paths
+
+
+def _run_and_cancel(paths, workers):
+    events = queue.Queue()
+    control = tool.BatchControl()
+    box = []
+    worker = threading.Thread(target=lambda: box.append(
+        tool.run_batch(paths, "zh-simp", "none", workers, events, control)), daemon=True)
+    worker.start()
+    while True:
+        ev = events.get(timeout=60)
+        if ev[0] == "file":
+            control.cancel()
+            break
+    worker.join(60)
+    assert not worker.is_alive()
+    return box[0]
+
+
+def _check(records, folder: Path, workers: int):
+    statuses = [r["status"] for r in records]
+    # 收到第一筆完成就取消：之後最多只有當時已在處理的 workers 個檔案能完成
+    assert 1 <= statuses.count("ok") <= 1 + workers
+    assert any(r.get("error") == "cancelled" for r in records)
+    for r in records:
+        if r.get("error") == "cancelled":
+            assert r["output"] is None
+    # 取消之後不可再有檔案被寫出：磁碟上的 _fixed 檔數量等於成功的紀錄數
+    outputs = sorted(folder.glob("*_fixed*.txt"))
+    assert len(outputs) == statuses.count("ok")
+
+
+def test_cancel_pool_path_stops_queued_files(tmp_path):
+    paths = _make_inputs(tmp_path, 12, 200_000)
+    records = _run_and_cancel(paths, workers=2)
+    _check(records, tmp_path, 2)
+
+
+def test_cancel_single_process_path(tmp_path):
+    paths = _make_inputs(tmp_path, 6, 200_000)
+    records = _run_and_cancel(paths, workers=1)
+    _check(records, tmp_path, 1)
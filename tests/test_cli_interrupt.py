@@ -0,0 +1,33 @@
+"""命令列模式按 Ctrl-C：中斷後完成或取消的檔案也要寫進 JSONL 報告"""
+import json
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+import corpus  # noqa: E402
+from _tool import tool_path  # noqa: E402
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="以 SIGINT 模擬 Ctrl-C")
+def test_interrupt_reports_every_file(tmp_path):
+    data = corpus.make_text("zh-Hans", 200_000).encode("gbk")
+    for i in range(20):
+        (tmp_path / f"f{i:02d}.txt").write_bytes(data)
+    report = tmp_path / "report.jsonl"
+    proc = subprocess.Popen([sys.executable, str(tool_path()), str(tmp_path), "-j", "2", "--report", str(report)],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    deadline = time.monotonic() + 60
+    while not (report.exists() and report.read_text(encoding="utf-8")):
+        assert proc.poll() is None and time.monotonic() < deadline
+        time.sleep(0.01)
+    proc.send_signal(signal.SIGINT)
+    proc.communicate(timeout=60)
+    records = [json.loads(line) for line in report.read_text(encoding="utf-8").splitlines()]
+    assert len(records) == 20
+    assert any(r.get("error") == "cancelled" for r in records)
+    assert proc.returncode == 1
@@ -0,0 +1,59 @@
+"""decode_bytes_detail 第一層：合法 UTF-8 的判定（帶重音的拉丁文不可被當成 UTF-16/亂碼）"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+import corpus  # noqa: E402
+from _tool import load_tool  # noqa: E402
+
+tool = load_tool()
+tool.set_progress_hook(None)
+
+MODES = ["auto", "en", "zh-simp", "zh-trad", "ja"]
+ACCENTED = "The café on Rue Saint-Honoré serves crème brûlée.\n"
+
+
+@pytest.mark.parametrize("mode", MODES)
+@pytest.mark.parametrize("text", [
+    ACCENTED * 40,                                   # 偶數長度：曾被當成無 BOM 的 UTF-16-LE
+    ACCENTED * 40 + "x",                             # 奇數長度：曾被當成 GB18030 / latin1 逆轉
+    "Über Größe: Straße, naïve façade — “quotes”.\n",
+    "Привет, мир! Это тест.\n" * 5,
+])
+def test_accented_utf8_is_kept(text, mode):
+    r = tool.decode_bytes_detail(text.encode("utf-8"), mode)
+    assert r.plan == ("bytes", "utf-8")
+    assert r.text == text
+
+
+@pytest.mark.parametrize("wrong,right", [("latin1", "gbk"), ("cp437", "gbk"), ("latin1", "utf-8")])
+def test_mojibake_saved_as_utf8_is_reversed(wrong, right):
+    clean = "这是一份用来测试乱码修复的中文文件。\n请在下午三点前把报表寄给财务部门。\n" * 20
+    b = clean.encode(right).decode(wrong).encode("utf-8")
+    r = tool.decode_bytes_detail(b, "zh-simp")
+    assert r.plan[:2] == ("mojibake", "utf-8")
+    assert r.text == clean
+    # 串流修復以同一個 plan 逐塊解碼，切在多位元組字元中間也要得到相同結果
+    decode = tool.plan_decoder(r.plan)
+    assert "".join(decode(b[i:i + 7], i + 7 >= len(b)) for i in range(0, len(b), 7)) == clean
+
+
+@pytest.mark.parametrize("enc", ["utf-16-le", "utf-16-be"])
+def test_bomless_utf16_still_detected(enc):
+    text = "這是一份文件。\n" * 10
+    r = tool.decode_bytes_detail(text.encode(enc), "auto")
+    assert r.plan == ("bytes", enc)
+    assert r.text == text
+
+
+@pytest.mark.parametrize("enc,mode", [("gbk", "zh-simp"), ("gb18030", "auto"), ("gbk", "auto")])
+def test_large_gbk_decodes_directly(enc, mode):
+    # 超過取樣門檻（約 256 KB）後改以分層取樣評分：視窗切在雙位元組中間不可讓逆轉候選勝出
+    clean = corpus.make_text("zh-Hans", 400_000)
+    b = clean.encode(enc)
+    assert len(tool._sample_windows(b)) > 1
+    r = tool.decode_bytes_detail(b, mode)
+    assert r.plan[0] == "bytes"
+    assert r.text == clean
@@ -0,0 +1,80 @@
+"""單檔平行解碼：切點不可落在多位元組字元中間，分段解碼接回後須與整份解碼相同"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+import corpus  # noqa: E402
+from _tool import load_tool  # noqa: E402
+
+tool = load_tool()
+tool.set_progress_hook(None)
+
+CJK = "中文測試：編碼切點不可落在字元中間，这是简体。"
+WIDE = "表情😀符號🎉與罕用字𠀀"     # UTF-8 四位元組、UTF-16 代理對、GB18030 四位元組
+
+
+def _text(enc: str) -> str:
+    extra = WIDE if enc in ("utf-8", "utf-16-le", "utf-16-be", "gb18030") else "漢字"
+    lines = [f"{k:04d} {CJK}{extra}\n" for k in range(300)]
+    # 沒有換行的長行：迫使切點改用單位元組或 UTF-8 首位元組；純多位元組的一段更要延長搜尋
+    lines.append((CJK + extra) * 60 + "\n")
+    lines.append(f"{CJK}, {extra}; " * 80 + "\n")
+    return "".join(lines)
+
+
+@pytest.fixture(autouse=True)
+def small_search(monkeypatch):
+    monkeypatch.setattr(tool, "PARALLEL_SEARCH_BYTES", 64)
+
+
+@pytest.mark.parametrize("enc", ["gbk", "gb18030", "big5", "shift_jis", "utf-8", "utf-16-le", "utf-16-be"])
+@pytest.mark.parametrize("chunk", [97, 256, 1000])
+def test_chunks_decode_independently(enc, chunk):
+    text = _text(enc)
+    b = text.encode(enc, errors="ignore")
+    text = b.decode(enc)
+    plan = ("bytes", enc)
+    cuts = tool.chunk_boundaries(b, plan, chunk)
+    assert cuts[0] == 0 and cuts[-1] == len(b)
+    assert cuts == sorted(set(cuts))
+    assert len(cuts) > 3
+    # 每段都能以嚴格模式獨立解碼，接回後等於整份解碼
+    assert "".join(b[lo:hi].decode(enc) for lo, hi in zip(cuts, cuts[1:])) == text
+
+
+def test_mojibake_plan_chunks_match_whole_decode():
+    clean = "这是一份用来测试乱码修复的中文文件，请在下午三点前寄出。" * 40 + "\n"
+    b = (clean * 20).encode("gbk").decode("cp437").encode("utf-8")
+    det = tool.decode_bytes_detail(b, "zh-simp")
+    assert det.plan[0] == "mojibake"
+    cuts = tool.chunk_boundaries(b, det.plan, 300)
+    assert len(cuts) > 3
+    assert "".join(tool._apply_plan(b[lo:hi], det.plan) for lo, hi in zip(cuts, cuts[1:])) == det.text
+
+
+def test_default_chunk_is_read_at_call_time(monkeypatch):
+    b = _text("utf-8").encode("utf-8")
+    monkeypatch.setattr(tool, "PARALLEL_CHUNK_BYTES", 512)
+    assert tool.chunk_boundaries(b, ("bytes", "utf-8")) == tool.chunk_boundaries(b, ("bytes", "utf-8"), 512)
+    monkeypatch.setattr(tool, "PARALLEL_CHUNK_BYTES", len(b) * 2)
+    assert tool.chunk_boundaries(b, ("bytes", "utf-8")) == [0, len(b)]
+
+
+@pytest.mark.parametrize("enc,mode", [("gbk", "zh-simp"), ("utf-8", "auto"), ("utf-16-le", "auto")])
+def test_parallel_output_equals_whole_decode(tmp_path, monkeypatch, enc, mode):
+    monkeypatch.setattr(tool, "PARALLEL_CHUNK_BYTES", 64 * 1024)
+    data = (corpus.make_text("zh-Hans", 150_000) + _text(enc)).encode(enc, errors="ignore")
+    if enc.startswith("utf-16"):
+        data = b"\xff\xfe" + data
+    src = tmp_path / "in.txt"
+    src.write_bytes(data)
+    det = tool.decode_bytes_detail(data, mode)
+    out = tmp_path / "out.txt"
+    ok, tag, path = tool.repair_text_parallel(src, data, out, mode, det, 2)
+    assert ok, tag
+    assert "平行" in tag
+    assert path.read_bytes().decode("utf-8") == det.text
+    # 暫存分段都已清掉
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["in.txt", "out.txt"]
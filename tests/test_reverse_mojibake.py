@@ -0,0 +1,38 @@
+"""transform_string / reverse_mojibake：已是正常文字的儲存格必須原樣保留，亂碼仍要逆轉"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+import corpus  # noqa: E402
+from _tool import load_tool  # noqa: E402
+
+tool = load_tool()
+tool.set_progress_hook(None)
+
+MODES = ["auto", "zh-simp", "zh-trad", "ja", "en"]
+
+
+@pytest.mark.parametrize("mode", MODES)
+@pytest.mark.parametrize("cell", [
+    "中文abc混合",
+    "這是 Excel 的 A1 儲存格",
+    "ABC株式会社",
+    "日本語テキスト123",
+    "Café 咖啡",
+    "plain ascii",
+])
+def test_clean_cells_are_untouched(cell, mode):
+    tool._TRANSFORM_CACHE.clear()
+    assert tool.reverse_mojibake(cell, mode) == (cell, None)
+    assert tool.transform_string(cell, mode) == cell
+
+
+@pytest.mark.parametrize("clean", corpus.SENTENCES["zh-Hans"])
+def test_mojibake_cells_are_still_reversed(clean):
+    # 提前返回只擋正常文字：真正的亂碼照樣進逆轉引擎
+    bad = corpus.garble(clean, "cp437", "gbk")
+    tool._TRANSFORM_CACHE.clear()
+    assert tool.reverse_mojibake(bad, "zh-simp") == (clean, ("cp437", "gbk"))
+    assert tool.transform_string(bad, "zh-simp") == clean
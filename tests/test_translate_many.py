@@ -0,0 +1,89 @@
+"""translate_many：以注入的 translator 替身檢查順序、標記衝突時的逐段重翻與失敗時保留原文"""
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+from _tool import load_tool  # noqa: E402
+
+tool = load_tool()
+tool.set_progress_hook(None)
+
+
+@pytest.fixture(autouse=True)
+def isolated(monkeypatch):
+    # 不讀寫持久快取、不等待重試退避與限速，記憶體快取每個測試重來
+    tool.configure_translation_cache(None)
+    tool._TRANSLATE_CACHE.clear()
+    monkeypatch.setattr(tool, "TRANSLATE_BACKOFF", 0.0)
+    monkeypatch.setattr(tool, "_RATE_LIMITER", tool.TokenBucket(0))
+    yield
+    tool._TRANSLATE_CACHE.clear()
+
+
+class Upper:
+    """把英文字母轉大寫；記錄每次收到的請求"""
+    def __init__(self, fail_on=None):
+        self.calls = []
+        self.fail_on = fail_on
+        self._lock = threading.Lock()
+
+    def translate(self, s):
+        with self._lock:
+            self.calls.append(s)
+        if self.fail_on and self.fail_on in s:
+            raise RuntimeError("service unavailable")
+        return s.upper()
+
+
+def test_order_and_edges_are_preserved():
+    texts = ["alpha", "", "  beta  ", "alpha", "gamma\n", 42, "delta", "beta"]
+    t = Upper()
+    out = tool.translate_many(texts, "en", translator=t)
+    # 非字串的儲存格原樣放回，其餘只翻譯去掉頭尾空白後的內容
+    assert out == ["ALPHA", "", "  BETA  ", "ALPHA", "GAMMA\n", 42, "DELTA", "BETA"]
+    # 去重後裝成一個批次送出，只呼叫一次
+    assert len(t.calls) == 1
+    assert all(tool._BATCH_MARK.format(j) in t.calls[0] for j in range(4))
+
+
+def test_many_batches_keep_order(monkeypatch):
+    monkeypatch.setattr(tool, "TRANSLATE_CHUNK_CHARS", 40)
+    texts = [f"item {k} text" for k in range(60)]
+    t = Upper()
+    out = tool.translate_many(texts, "en", translator=t)
+    assert out == [s.upper() for s in texts]
+    assert 1 < len(t.calls) < len(texts)
+
+
+def test_marker_in_content_falls_back_to_single_fragments():
+    texts = ["first", "contains [[1]] marker", "third"]
+    t = Upper()
+    out = tool.translate_many(texts, "en", translator=t)
+    assert out == ["FIRST", "CONTAINS [[1]] MARKER", "THIRD"]
+    # 第一次是整批請求；切不回 3 段後改為逐段送出
+    assert len(t.calls) == 1 + len(texts)
+    assert t.calls[1:] == texts
+
+
+def test_failure_keeps_source_text(tmp_path):
+    tool.configure_translation_cache(tmp_path / "cache.sqlite3")
+    texts = ["good one", "bad one", "good two"]
+    t = Upper(fail_on="bad")
+    out = tool.translate_many(texts, "en", translator=t)
+    assert out == ["GOOD ONE", "bad one", "GOOD TWO"]
+    # 整批失敗 → 逐段重翻；遠端後端每段最多嘗試 TRANSLATE_RETRIES + 1 次
+    assert t.calls.count("bad one") == tool.TRANSLATE_RETRIES + 1
+    # 成功的片段寫入持久快取，失敗保留的原文不寫入（下次仍會重試）
+    stored = tool.get_translation_store().get_many("Upper", "auto", "en", texts)
+    assert stored == {"good one": "GOOD ONE", "good two": "GOOD TWO"}
+    tool.configure_translation_cache(None)
+
+
+def test_none_target_and_empty_input_are_untouched():
+    t = Upper()
+    assert tool.translate_many(["abc"], "none", translator=t) == ["abc"]
+    assert tool.translate_many([], "en", translator=t) == []
+    assert t.calls == []
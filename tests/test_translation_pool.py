@@ -0,0 +1,134 @@
+"""外語翻譯的重試退避、執行緒池順序與限速：以 set_translator_factory 換上會失敗指定次數的替身"""
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+from _tool import load_tool  # noqa: E402
+
+tool = load_tool()
+tool.set_progress_hook(None)
+
+
+class Flaky:
+    """前 fail 次呼叫丟例外，之後回傳大寫；狀態由同一個 factory 建出的所有實例共用"""
+    def __init__(self, state):
+        self.state = state
+
+    def translate(self, s):
+        st = self.state
+        with st["lock"]:
+            st["calls"].append(s)
+            st["stamps"].append(time.monotonic())
+            st["active"] += 1
+            st["peak"] = max(st["peak"], st["active"])
+            fail = st["fail"] > 0
+            st["fail"] -= fail
+        try:
+            delay = st["delay"](s)
+            if delay:
+                time.sleep(delay)
+            if fail:
+                raise ConnectionError("429 Too Many Requests")
+            return s.upper()
+        finally:
+            with st["lock"]:
+                st["active"] -= 1
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    state = {"lock": threading.Lock(), "calls": [], "stamps": [], "active": 0, "peak": 0,
+             "fail": 0, "instances": 0, "delay": lambda s: 0}
+
+    def factory(target):
+        state["instances"] += 1
+        return Flaky(state)
+
+    tool.configure_translation_cache(None)
+    tool._TRANSLATE_CACHE.clear()
+    for name in ("TRANSLATE_CONCURRENCY", "TRANSLATE_RATE", "_RATE_LIMITER", "TRANSLATOR_FACTORY"):
+        monkeypatch.setattr(tool, name, getattr(tool, name))
+    monkeypatch.setenv("TEXTFIX_TRANSLATE_CONCURRENCY", "4")
+    monkeypatch.setenv("TEXTFIX_TRANSLATE_RATE", "0")
+    tool.configure_translation_pool(concurrency=4, rate=0)
+    tool.set_translator_factory(factory)
+    yield state
+    tool.set_translator_factory(None)
+    tool._TRANSLATE_CACHE.clear()
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    # 退避只記錄不真的等待；抖動固定為 1 倍
+    got = []
+    monkeypatch.setattr(tool.time, "sleep", got.append)
+    monkeypatch.setattr(tool.random, "random", lambda: 0.5)
+    return got
+
+
+@pytest.mark.parametrize("fail", [0, 1, tool.TRANSLATE_RETRIES])
+def test_retries_until_success(fake, sleeps, fail):
+    fake["fail"] = fail
+    assert tool.translate_text("hello world", "en") == "HELLO WORLD"
+    assert len(fake["calls"]) == fail + 1
+    assert sleeps == [tool.TRANSLATE_BACKOFF * 2 ** k for k in range(fail)]
+
+
+def test_retries_exhausted_fall_back_to_source(fake, sleeps, monkeypatch):
+    monkeypatch.setattr(tool, "TRANSLATE_BACKOFF_MAX", 0.75)
+    fake["fail"] = tool.TRANSLATE_RETRIES + 5
+    assert tool.translate_text("hello world", "en") == "hello world"
+    assert len(fake["calls"]) == tool.TRANSLATE_RETRIES + 1
+    # 最後一次失敗後不再等待；等待時間加倍但不超過上限
+    assert sleeps == [min(0.75, tool.TRANSLATE_BACKOFF * 2 ** k) for k in range(tool.TRANSLATE_RETRIES)]
+    # 失敗結果不可被當成譯文快取：服務恢復後同一段會重新送出
+    fake["fail"] = 0
+    tool._TRANSLATE_CACHE.clear()
+    assert tool.translate_text("hello world", "en") == "HELLO WORLD"
+
+
+def test_pool_keeps_order_and_caps_concurrency(fake, monkeypatch):
+    monkeypatch.setattr(tool, "TRANSLATE_CHUNK_CHARS", 30)
+    monkeypatch.setattr(tool, "TRANSLATE_CONCURRENCY", 3)
+    texts = [f"fragment number {k:02d}" for k in range(24)]
+    # 越早送出的批次越慢完成，結果仍須依原順序
+    fake["delay"] = lambda s: 0.02 if "00" in s else 0.001
+    out = tool.translate_many(texts, "en")
+    assert out == [s.upper() for s in texts]
+    assert len(fake["calls"]) > 3
+    assert 1 < fake["peak"] <= 3
+    # 每個工作執行緒一個翻譯器實例，外加建立後端時的第一個
+    assert fake["instances"] <= 3 + 1
+
+
+def test_run_translation_jobs_returns_in_submission_order(fake):
+    def job(k):
+        time.sleep(0.002 * (10 - k))
+        return k
+    jobs = [lambda k=k: job(k) for k in range(10)]
+    assert tool._run_translation_jobs(jobs, parallel=True) == list(range(10))
+
+
+def test_rate_limit_spaces_requests(fake, monkeypatch):
+    monkeypatch.setattr(tool, "TRANSLATE_CHUNK_CHARS", 10)
+    tool.configure_translation_pool(concurrency=2, rate=50)
+    texts = [f"text {k:02d}" for k in range(12)]
+    start = time.monotonic()
+    out = tool.translate_many(texts, "en")
+    elapsed = time.monotonic() - start
+    assert out == [s.upper() for s in texts]
+    assert len(fake["calls"]) == len(texts)
+    # 一開始可用掉 burst（= 並行數）個令牌，其餘依每秒 50 次發放
+    assert elapsed >= (len(texts) - 2) / 50 * 0.9
+
+
+def test_rate_zero_means_unlimited():
+    bucket = tool.TokenBucket(0)
+    start = time.monotonic()
+    for _ in range(1000):
+        bucket.acquire()
+    assert time.monotonic() - start < 0.5
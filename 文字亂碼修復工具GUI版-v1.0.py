@@ -3,50 +3,301 @@
 
 import time
 start_time = time.time()
-print(start_time)
-print("======================================")
 
 # -*- coding: utf-8 -*-
 # Text/Excel/Word 亂碼修復 + 翻譯 GUI（v4.1 + inline progress ASCII）
-import tkinter as tk
-from tkinter import filedialog, ttk
+# tkinter 與各選用套件都延遲到真正用到時才 import（見下方 Optional deps 與 GUI 區段）
 from pathlib import Path
+import argparse
+import base64
+import glob
+import hashlib
+import json
+import sys
+import codecs
+import contextlib
+import functools
+import importlib
+import importlib.util
+import mmap
+import os
+import queue
+import random
+import re
 import shutil
-from typing import List, Tuple, Optional, Dict
+import tempfile
+import threading
+import zlib
+from collections import OrderedDict
+from typing import List, Tuple, Optional, Dict, NamedTuple, Callable, Set, Any, Iterable
 
 # --- Progress hook（不開彈窗版本）---
 PROGRESS_HOOK = None
-def set_progress_hook(fn):
-    """fn(stage, i=None, total=None, label=None)"""
+PROGRESS_MAX_HZ = 20   # tick 最多每秒送出幾次；begin/end 與完成時的 tick 不受限
+
+class _CoalescedHook:
+    """合併過密的 tick：儲存格/run 層級的工作每秒可能回報數十萬次，介面只需要重畫幾十次。
+    every：每次回拋都呼叫、不受合併影響（暫停/取消的檢查點）"""
+    __slots__ = ("fn", "every", "_next", "_full")
+
+    def __init__(self, fn, every: Optional[Callable[[], None]] = None):
+        self.fn = fn
+        self.every = every
+        self._next = 0.0
+        self._full = False   # 本階段已送出過 i >= total 的 tick（總數低估時後續 tick 照常合併）
+
+    def __call__(self, stage, **kw):
+        if self.every is not None:
+            self.every()
+        if stage == "tick":
+            i, total = kw.get("i"), kw.get("total")
+            if i is not None and total is not None and i >= total and not self._full:
+                self._full = True
+            else:
+                now = time.monotonic()
+                if now < self._next:
+                    return
+                self._next = now + 1.0 / PROGRESS_MAX_HZ
+        elif stage == "begin":
+            self._full = False
+        self.fn(stage, **kw)
+
+def set_progress_hook(fn, every: Optional[Callable[[], None]] = None):
+    """fn(stage, i=None, total=None, label=None)；tick 會依 PROGRESS_MAX_HZ 合併後才轉給 fn"""
     global PROGRESS_HOOK
+    if fn is not None and not isinstance(fn, _CoalescedHook):
+        fn = _CoalescedHook(fn, every)
     PROGRESS_HOOK = fn
 
-# ---------- Optional deps ----------
-try:
-    import openpyxl
-except Exception:
-    openpyxl = None
+@contextlib.contextmanager
+def muted_progress():
+    """暫時關閉進度回拋（外層自行回報進度時使用）"""
+    global PROGRESS_HOOK
+    saved = PROGRESS_HOOK
+    PROGRESS_HOOK = None
+    try:
+        yield
+    finally:
+        PROGRESS_HOOK = saved
+
+# --- 結構化追蹤（效能剖析用；未啟用時每個追蹤點只多一次 None 判斷）---
+TRACE_ENV = "TEXTFIX_TRACE"   # 設為輸出路徑即啟用：結束時寫出 Chrome trace JSON（ui.perfetto.dev 可開）
+TRACE_SINK: Optional[Callable[[Dict[str, Any]], None]] = None
+
+def set_trace_sink(fn: Optional[Callable[[Dict[str, Any]], None]]):
+    """fn(event: dict)；event 含 kind(begin/end/candidate/cache/instant)、name、ts（time.monotonic_ns）、pid、tid 與各自欄位。
+    可能由翻譯執行緒呼叫，fn 需可跨執行緒使用"""
+    global TRACE_SINK
+    TRACE_SINK = fn
+
+def trace_event(kind: str, name: str, **fields):
+    sink = TRACE_SINK
+    if sink is not None:
+        fields.update(kind=kind, name=name, ts=time.monotonic_ns(), pid=os.getpid(), tid=threading.get_ident())
+        sink(fields)
+
+class _TraceSpan:
+    __slots__ = ("name", "fields")
+
+    def __init__(self, name: str, fields: Dict[str, Any]):
+        self.name = name
+        self.fields = fields
+
+    def set(self, **fields):
+        """補充結束時才知道的欄位（採用的編碼、輸出位元組數…）"""
+        self.fields.update(fields)
+
+    def __enter__(self):
+        trace_event("begin", self.name)
+        return self
 
-try:
-    import docx
-except Exception:
-    docx = None
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.fields["error"] = exc_type.__name__
+        trace_event("end", self.name, **self.fields)
+        return False
+
+class _NoSpan:
+    __slots__ = ()
+
+    def set(self, **fields):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NO_SPAN = _NoSpan()
+
+def trace_span(name: str, **fields):
+    """with trace_span("decode", bytes=n) as sp: ... sp.set(tag=...)；欄位記在結束事件上"""
+    return _TraceSpan(name, fields) if TRACE_SINK is not None else _NO_SPAN
+
+class TraceRecorder:
+    """收集追蹤事件，輸出 Chrome trace JSON 與各階段摘要（次數、總/平均/最長毫秒、位元組數）"""
+    def __init__(self):
+        self.events: List[Dict[str, Any]] = []
+
+    def __call__(self, event: Dict[str, Any]):
+        self.events.append(event)   # list.append 本身是原子操作，多執行緒同時寫入也安全
+
+    def drain(self) -> List[Dict[str, Any]]:
+        events, self.events = self.events, []
+        return events
+
+    def _spans(self) -> Iterable[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        stacks: Dict[Tuple[int, int], List[Dict[str, Any]]] = {}
+        for ev in sorted(self.events, key=lambda e: e["ts"]):
+            if ev["kind"] == "begin":
+                stacks.setdefault((ev["pid"], ev["tid"]), []).append(ev)
+            elif ev["kind"] == "end":
+                stack = stacks.get((ev["pid"], ev["tid"]))
+                while stack:
+                    begin = stack.pop()
+                    if begin["name"] == ev["name"]:
+                        yield begin, ev
+                        break
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        stages: Dict[str, Dict[str, Any]] = {}
+        for begin, end in self._spans():
+            ms = (end["ts"] - begin["ts"]) / 1e6
+            s = stages.setdefault(end["name"], {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "bytes": 0})
+            s["count"] += 1
+            s["total_ms"] += ms
+            s["max_ms"] = max(s["max_ms"], ms)
+            if isinstance(end.get("bytes"), int):
+                s["bytes"] += end["bytes"]
+        for name, s in stages.items():
+            s["mean_ms"] = s["total_ms"] / s["count"]
+            for k in ("total_ms", "max_ms", "mean_ms"):
+                s[k] = round(s[k], 3)
+        for ev in self.events:
+            if ev["kind"] == "cache":
+                s = stages.setdefault(f"cache:{ev['cache']}", {"hits": 0, "misses": 0})
+                s["hits"] += ev.get("hits", 0)
+                s["misses"] += ev.get("misses", 0)
+        return dict(sorted(stages.items()))
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        t0 = min((ev["ts"] for ev in self.events), default=0)
+        out = []
+        for ev in self.events:
+            args = {k: v for k, v in ev.items() if k not in ("kind", "name", "ts", "pid", "tid")}
+            item = {"name": ev["name"], "ts": (ev["ts"] - t0) / 1000, "pid": ev["pid"], "tid": ev["tid"]}
+            if ev["kind"] == "begin":
+                item["ph"] = "B"
+            elif ev["kind"] == "end":
+                item["ph"] = "E"
+            elif ev["kind"] == "cache":
+                item.update(ph="C", name=f"cache:{ev['cache']}")
+                args = {"hits": ev.get("hits", 0), "misses": ev.get("misses", 0)}
+            else:
+                item.update(ph="i", s="t", cat=ev["kind"])
+            item["args"] = args
+            out.append(item)
+        return {"traceEvents": out, "displayTimeUnit": "ms", "otherData": {"summary": self.summary()}}
 
-try:
-    from opencc import OpenCC
-except Exception:
-    OpenCC = None
+    def write(self, path: Path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(), f, ensure_ascii=False, default=str)
 
-try:
-    from deep_translator import GoogleTranslator
-except Exception:
-    GoogleTranslator = None
+def format_trace_summary(summary: Dict[str, Dict[str, Any]]) -> str:
+    lines = [f"{'階段':<24}{'次數':>8}{'總毫秒':>12}{'平均':>10}{'最長':>10}{'位元組':>14}"]
+    for name, s in summary.items():
+        if "hits" in s:
+            lines.append(f"{name:<24}{'命中 ' + str(s['hits']):>18}{'未命中 ' + str(s['misses']):>20}")
+        else:
+            lines.append(f"{name:<24}{s['count']:>8}{s['total_ms']:>12.1f}{s['mean_ms']:>10.2f}"
+                         f"{s['max_ms']:>10.1f}{s['bytes']:>14}")
+    return "\n".join(lines)
+
+def enable_tracing(path: Optional[str] = None) -> Optional[TraceRecorder]:
+    """依 path 或環境變數 TEXTFIX_TRACE 安裝 TraceRecorder；已安裝則沿用"""
+    path = path or os.environ.get(TRACE_ENV)
+    if not path:
+        return None
+    os.environ[TRACE_ENV] = path
+    if not isinstance(TRACE_SINK, TraceRecorder):
+        set_trace_sink(TraceRecorder())
+    return TRACE_SINK
+
+def finish_tracing(recorder: Optional[TraceRecorder]):
+    """寫出 TEXTFIX_TRACE 指定的 Chrome trace，摘要印到 stderr"""
+    if recorder is None:
+        return
+    path = os.environ.get(TRACE_ENV)
+    try:
+        recorder.write(Path(path))
+        print(f"追蹤檔：{path}", file=sys.stderr)
+    except Exception as e:
+        print(f"追蹤檔寫出失敗：{e}", file=sys.stderr)
+    print(format_trace_summary(recorder.summary()), file=sys.stderr)
+
+# ---------- Optional deps（延遲載入） ----------
+# 只修 .txt 且不翻譯時完全用不到這些套件；第一次走到對應的修復/翻譯路徑才 import
+_LAZY_MODULES: Dict[str, Any] = {}
+
+def _lazy_import(name: str):
+    """import 失敗回傳 None；結果會快取，每個行程只嘗試一次"""
+    if name not in _LAZY_MODULES:
+        try:
+            _LAZY_MODULES[name] = importlib.import_module(name)
+        except Exception:
+            _LAZY_MODULES[name] = None
+    return _LAZY_MODULES[name]
+
+def dependency_available(name: str) -> bool:
+    """只查詢是否已安裝，不實際 import（GUI 顯示依賴狀態用）"""
+    if name in _LAZY_MODULES:
+        return _LAZY_MODULES[name] is not None
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+def get_openpyxl():
+    return _lazy_import("openpyxl")
+
+def get_docx():
+    return _lazy_import("docx")
+
+def get_opencc_class():
+    mod = _lazy_import("opencc")
+    return getattr(mod, "OpenCC", None)
+
+def get_google_translator_class():
+    mod = _lazy_import("deep_translator")
+    return getattr(mod, "GoogleTranslator", None)
 
 # ---------- Supported types ----------
 TEXT_EXTS = {".txt", ".csv", ".tsv", ".srt", ".ass", ".md", ".json",
              ".yaml", ".yml", ".log", ".ini", ".cfg", ".html", ".htm", ".xml"}
 XLSX_EXTS = {".xlsx"}
 DOCX_EXTS = {".docx"}
+TYPE_EXTS = {"text": TEXT_EXTS, "xlsx": XLSX_EXTS, "docx": DOCX_EXTS}
+
+# ---------- 串流模式（大檔） ----------
+STREAM_THRESHOLD_BYTES = 32 * 1024 * 1024   # 超過此大小改走串流修復
+STREAM_BLOCK_BYTES = 1024 * 1024            # 每次解碼/寫出的區塊大小
+STREAM_SAMPLE_BYTES = 1024 * 1024           # 用於判斷編碼的開頭樣本大小
+PARALLEL_CHUNK_BYTES = 8 * 1024 * 1024      # 單檔平行解碼：每段大小（切點再往後找到安全位置）
+PARALLEL_SEARCH_BYTES = 1024 * 1024         # 找切點時最多往後看多遠，找不到就併入下一段
+PARALLEL_MIXED_RATIO = 1000                 # 一段中解不開的位元組超過 1/1000 才改為該段自行偵測編碼
+DECODE_WORKERS = int(os.environ.get("TEXTFIX_DECODE_WORKERS") or 0)   # 單檔平行解碼的行程數；0 = CPU 核心數，1 = 停用
+XLSX_STREAM_THRESHOLD_BYTES = 16 * 1024 * 1024   # 啟用串流時，超過此大小的 .xlsx 改走 read-only/write-only 串流
+XLSX_STREAMING_ENV = "TEXTFIX_XLSX_STREAMING"      # 設為 1 / on 才啟用：串流輸出不保留樣式、欄寬、合併儲存格與超連結
+XLSX_STREAMING = os.environ.get(XLSX_STREAMING_ENV, "").strip().lower() in ("1", "on", "true", "yes")
+XLSX_STREAM_TAG = "串流：未保留樣式、欄寬、合併儲存格與超連結"
+
+# ---------- 批次處理 ----------
+BATCH_WORKERS = os.cpu_count() or 1         # 多檔批次使用的行程數；1 = 在目前行程依序處理
+
+# ---------- 編碼偵測取樣 ----------
+DETECT_SAMPLE_WINDOWS = 8                   # 分層取樣的視窗數（平均分佈於整個檔案）
+DETECT_WINDOW_BYTES = 16 * 1024             # 每個視窗大小（偶數，UTF-16 才不會錯位）
 
 # ---------- UI <-> 內部值映射 ----------
 def ui_src_mode(val: str) -> str:
@@ -68,9 +319,114 @@ def ui_target_code(val: str) -> str:
     }.get(val, "none")
 
 # ---------- 檢測與評分 ----------
+SCORE_BATCH_MIN_CHARS = 2048   # 短字串逐字計算即可；長字串改用批次統計
+
+# 批次統計：字串轉成 UTF-16 後，每個單位的「高位元組」就是碼位所在的 256 字頁。
+# 以 bytes.translate 把字頁/低位元組映成類別字母再 count，整個過程都在 C 層完成。
+# 補充平面字元會成為 D8–DF 的代理對，不會與下列 BMP 區段重疊。
+_STAT_RANGES = {   # 類別 -> [((高位元組起, 迄), (低位元組起, 迄)), ...]
+    "cjk": [((0x4E, 0x9F), (0x00, 0xFF))],
+    "kana": [((0x30, 0x30), (0x40, 0xFF)), ((0x31, 0x31), (0xF0, 0xFF)), ((0xFF, 0xFF), (0x66, 0x9F))],
+    "hangul": [((0x11, 0x11), (0x00, 0xFF)), ((0x31, 0x31), (0x30, 0x8F)),
+               ((0xAC, 0xD6), (0x00, 0xFF)), ((0xD7, 0xD7), (0x00, 0xAF))],
+    "replacement": [((0xFF, 0xFF), (0xFD, 0xFD))],
+    "control": [((0x00, 0x00), (0x00, 0x08)), ((0x00, 0x00), (0x0B, 0x0C)),
+                ((0x00, 0x00), (0x0E, 0x1F)), ((0x00, 0x00), (0x7F, 0x9F))],
+}
+# 常見的不可列印字元先整批計數移除，剩下的才用 isprintable 二分搜尋
+_COMMON_NONPRINT = "\n\r\t\u3000\xa0\u200b\ufeff"
+
+def _byte_classes(bounds: List[Tuple[int, int]], letters: bytes) -> Tuple[bytes, Dict[int, int]]:
+    """依區段邊界把 0–255 切成數類，回傳 translate 表與「位元組 -> 類別字母」"""
+    cuts = sorted({0, 256} | {a for a, _ in bounds} | {b + 1 for _, b in bounds})
+    table = bytearray(256)
+    for k, (a, b) in enumerate(zip(cuts, cuts[1:])):
+        table[a:b] = bytes([letters[k]]) * (b - a)
+    return bytes(table), {i: table[i] for i in range(256)}
+
+def _build_stat_tables():
+    his = [r[0] for ranges in _STAT_RANGES.values() for r in ranges]
+    los = [r[1] for ranges in _STAT_RANGES.values() for r in ranges]
+    hi_table, hi_of = _byte_classes(his, b"ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+    lo_table, lo_of = _byte_classes(los, b"abcdefghijklmnopqrstuvwxyz")
+    patterns = {}
+    for key, ranges in _STAT_RANGES.items():
+        pats = set()
+        for (h0, h1), (l0, l1) in ranges:
+            for h in {hi_of[i] for i in range(h0, h1 + 1)}:
+                if (l0, l1) == (0x00, 0xFF):
+                    pats.add(bytes([h]))
+                else:
+                    pats.update(bytes([h, l]) for l in {lo_of[i] for i in range(l0, l1 + 1)})
+        patterns[key] = sorted(pats)
+    return hi_table, lo_table, patterns
+
+_HI_TABLE, _LO_TABLE, _STAT_PATTERNS = _build_stat_tables()
+# 舊版 Unicode 資料庫中尚未指派的 CJK 碼位不可列印，逐字版本不會計入，批次版本需扣除
+_CJK_NONPRINT = [chr(i) for i in range(0x4E00, 0xA000) if not chr(i).isprintable()]
+
+def _bisect_nonprintable(s: str) -> int:
+    if s.isprintable():
+        return 0
+    if len(s) <= 64:
+        return sum(1 for ch in s if not ch.isprintable())
+    mid = len(s) // 2
+    return _bisect_nonprintable(s[:mid]) + _bisect_nonprintable(s[mid:])
+
+def _count_nonprintable(s: str) -> int:
+    n = 0
+    for ch in _COMMON_NONPRINT:
+        c = s.count(ch)
+        if c:
+            n += c
+            s = s.replace(ch, "")
+    return n + _bisect_nonprintable(s)
+
+def _range_histogram(s: str, keys) -> Dict[str, int]:
+    """一次轉換取得各類別的碼位計數（見 _STAT_RANGES）"""
+    u16 = s.encode("utf-16-le", "surrogatepass")
+    hi = u16[1::2].translate(_HI_TABLE)
+    hi_counts: Dict[bytes, int] = {}
+    pairs = None
+    counts = {}
+    for key in keys:
+        n = 0
+        for pat in _STAT_PATTERNS[key]:
+            head = pat[:1]
+            if head not in hi_counts:
+                hi_counts[head] = hi.count(head)
+            if len(pat) == 1:
+                n += hi_counts[head]
+            elif hi_counts[head]:
+                if pairs is None:
+                    # 高/低位元組用大小寫兩套字母交錯排列，成對比對時不可能跨單位錯位
+                    pairs = bytearray(len(u16))
+                    pairs[0::2] = hi
+                    pairs[1::2] = u16[0::2].translate(_LO_TABLE)
+                n += pairs.count(pat)
+        counts[key] = n
+    return counts
+
+def text_stats(s: str) -> Dict[str, float]:
+    """一次算出各類字元比例：cjk/kana/hangul/replacement 以可列印字元為分母（同 cjk_ratio），
+    control 以總長為分母；printable 為可列印字元數"""
+    n = len(s)
+    printable = n - _count_nonprintable(s)
+    counts = _range_histogram(s, ("cjk", "kana", "hangul", "replacement", "control"))
+    stats = {"printable": float(printable), "control": (counts["control"] / n) if n else 0.0}
+    for key in ("cjk", "kana", "hangul", "replacement"):
+        stats[key] = (counts[key] / printable) if printable else 0.0
+    return stats
+
 def cjk_ratio(s: str) -> float:
     if not s:
         return 0.0
+    if len(s) >= SCORE_BATCH_MIN_CHARS:
+        if s.isascii():
+            return 0.0
+        total = len(s) - _count_nonprintable(s)
+        cjk = _range_histogram(s, ("cjk",))["cjk"] - sum(s.count(ch) for ch in _CJK_NONPRINT)
+        return (cjk / total) if total else 0.0
     total = 0
     cjk = 0
     for ch in s:
@@ -82,6 +438,17 @@ def cjk_ratio(s: str) -> float:
     return (cjk / total) if total else 0.0
 
 def looks_mojibake(s: str) -> bool:
+    if s.isascii():
+        return False
+    if len(s) >= SCORE_BATCH_MIN_CHARS:
+        # 先只數 CJK：一個都沒有必為亂碼、佔總長 2% 以上必不是（可列印字數 ≤ 總長），
+        # 其餘才需要扣掉不可列印字元精算（亂碼常夾大量 C1 控制字元，這一步最慢）
+        cjk = _range_histogram(s, ("cjk",))["cjk"] - sum(s.count(ch) for ch in _CJK_NONPRINT)
+        if cjk <= 0:
+            return True
+        if cjk >= 0.02 * len(s):
+            return False
+        return cjk_ratio(s) < 0.02
     non_ascii = sum(1 for ch in s if ord(ch) > 127)
     return (non_ascii > 0) and (cjk_ratio(s) < 0.02)
 
@@ -120,29 +487,267 @@ def pairs_for_mode(mode: str) -> List[Tuple[str, str]]:
         return [("latin1", "utf-8"), ("cp1252", "utf-8")]
     return zh_pairs + ja_pairs + [("latin1", "utf-8"), ("cp1252", "utf-8")]
 
+# ---------- 有上限的 LRU 快取 ----------
+TRANSFORM_CACHE_MAX_ENTRIES = 50_000          # transform_string / safe_fix_stem 各自的筆數上限
+TRANSFORM_CACHE_MAX_BYTES = 64 * 1024 * 1024  # 估計記憶體上限（key + value 字串大小）
+TRANSFORM_CACHE_MAX_CHARS = 4096              # 超過此長度的字串（整份文字檔）不進快取
+
+_MISSING = object()
+
+def _approx_size(obj) -> int:
+    if isinstance(obj, tuple):
+        return sys.getsizeof(obj) + sum(_approx_size(x) for x in obj)
+    return sys.getsizeof(obj)
+
+class LRUCache:
+    """同時限制筆數與估計記憶體的 LRU；記錄命中/未命中/淘汰次數，可跨執行緒使用"""
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[Any, Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key, value):
+        size = _approx_size(key) + _approx_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._data[key] = (value, size)
+            self._bytes += size
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, freed) = self._data.popitem(last=False)
+                self._bytes -= freed
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "entries": len(self._data), "bytes": self._bytes,
+                    "max_entries": self.max_entries, "max_bytes": self.max_bytes}
+
+_TRANSFORM_CACHE = LRUCache(TRANSFORM_CACHE_MAX_ENTRIES, TRANSFORM_CACHE_MAX_BYTES)
+_STEM_CACHE = LRUCache(TRANSFORM_CACHE_MAX_ENTRIES, TRANSFORM_CACHE_MAX_BYTES // 8)
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    stats = {"transform_string": _TRANSFORM_CACHE.stats(), "safe_fix_stem": _STEM_CACHE.stats(),
+             "translate": _TRANSLATE_CACHE.stats()}
+    store = get_translation_store()
+    if store is not None:
+        stats["translation_store"] = store.stats()
+    return stats
+
+def _cache_counters() -> Dict[str, Tuple[int, int]]:
+    counters = {"transform_string": (_TRANSFORM_CACHE.hits, _TRANSFORM_CACHE.misses),
+                "translate": (_TRANSLATE_CACHE.hits, _TRANSLATE_CACHE.misses)}
+    store = _TRANSLATION_STORE
+    if store is not None:
+        counters["translation_store"] = (store.hits, store.misses)
+    return counters
+
+def trace_cache_deltas(before: Dict[str, Tuple[int, int]]):
+    """送出自 before 以來各快取的命中/未命中次數（每個檔案一筆，不逐字串記錄）"""
+    for name, (hits, misses) in _cache_counters().items():
+        h0, m0 = before.get(name, (0, 0))
+        if hits - h0 or misses - m0:
+            trace_event("cache", name, cache=name, hits=hits - h0, misses=misses - m0)
+
 # ---------- mojibake 逆轉 ----------
-def transform_string(bad: str, mode: str) -> str:
+REVERSE_PREFIX_BYTES = 8192     # 長字串先以前段評分各 right 編碼
+REVERSE_PRUNE_MARGIN = 0.15     # 前段分數落後目前最佳者超過此值，視為明顯落敗、不做整段解碼
+_SINGLE_BYTE_WRONG = ("cp437", "latin1", "cp1252")   # 以查表還原位元組的 wrong 編碼
+_REVERSE_VIA = ("latin1", "cp1252", "cp437")   # 亂碼字串多半正是用這幾個解出來的，可無錯誤地編碼回去
+
+@functools.lru_cache(maxsize=None)
+def _char_to_byte(wrong: str) -> Dict[int, int]:
+    table: Dict[int, int] = {}
+    for b in range(256):
+        try:
+            table[ord(bytes([b]).decode(wrong))] = b
+        except UnicodeDecodeError:
+            continue
+    return table
+
+@functools.lru_cache(maxsize=None)
+def _transcode_table(via: str, wrong: str) -> Tuple[bytes, bytes]:
+    """via 編碼的位元組 -> 同一字元在 wrong 編碼的位元組（bytes.translate 的對照表與刪除集）"""
+    to_byte = _char_to_byte(wrong)
+    table = bytearray(range(256))
+    delete = bytearray()
+    for b in range(256):
+        try:
+            c = ord(bytes([b]).decode(via))
+        except UnicodeDecodeError:
+            delete.append(b)
+            continue
+        if c in to_byte:
+            table[b] = to_byte[c]
+        else:
+            delete.append(b)
+    return bytes(table), bytes(delete)
+
+@functools.lru_cache(maxsize=None)
+def _reverse_list(wrong: str) -> List[Optional[int]]:
+    """BMP 碼位 -> 原位元組（None = 刪除）；str.translate 以串列查表比 dict 快，BMP 以外的字元由 latin1 編碼略過"""
+    table: List[Optional[int]] = [None] * 0x10000
+    for c, b in _char_to_byte(wrong).items():
+        table[c] = b
+    return table
+
+@functools.lru_cache(maxsize=None)
+def _encoding_map(via: str):
+    """單位元組編碼的 C 層編碼表（cp437 模組內建的是 dict，逐字查表很慢）"""
+    chars = []
+    for b in range(256):
+        try:
+            chars.append(bytes([b]).decode(via))
+        except UnicodeDecodeError:
+            chars.append("\ufffe")
+    return codecs.charmap_build("".join(chars))
+
+@functools.lru_cache(maxsize=None)
+def _codec_name(enc: str) -> str:
+    return codecs.lookup(enc).name   # cp936 與 gbk 是同一個解碼器
+
+def _recover_bytes(s: str, wrong: str) -> bytes:
+    """等同 s.encode(wrong, errors="ignore")，但單位元組編碼不必為每個無法編碼的字元走一次錯誤處理：
+    先以 latin1/cp1252/cp437 之一無錯誤編碼，再用 bytes.translate 一次換成 wrong 的位元組"""
+    if wrong in _SINGLE_BYTE_WRONG:
+        for via in _REVERSE_VIA:
+            try:
+                raw = s.encode(via) if via == "latin1" else codecs.charmap_encode(s, "strict", _encoding_map(via))[0]
+            except UnicodeEncodeError:
+                continue
+            return raw if via == wrong else raw.translate(*_transcode_table(via, wrong))
+        return s.translate(_reverse_list(wrong)).encode("latin1", errors="ignore")
+    return s.encode(wrong, errors="ignore")
+
+def reverse_mojibake(bad: str, mode: str) -> Tuple[str, Optional[Tuple[str, str]]]:
+    """同 transform_string，另回傳採用的 (wrong, right) 逆轉對；維持原文時為 None。
+    每個 wrong 編碼只還原一次位元組，位元組相同且 right 為同一解碼器的候選只解一次；
+    長字串先解前段評分，明顯落後目前最佳者的候選直接略過"""
+    if TRACE_SINK is None:
+        return _reverse_mojibake(bad, mode)
+    with trace_span("reverse", chars=len(bad), mode=mode) as sp:
+        fixed, pair = _reverse_mojibake(bad, mode)
+        sp.set(pair=f"{pair[0]}>{pair[1]}" if pair else None)
+        return fixed, pair
+
+def _reverse_mojibake(bad: str, mode: str) -> Tuple[str, Optional[Tuple[str, str]]]:
+    if not looks_mojibake(bad):
+        # 純 ASCII 或已含足量中日韓字：沒有可逆轉的亂碼，原樣回傳。
+        # 舊引擎會對正常文字照樣逆轉，無法以 cp437 編碼的字被 ignore 丟掉（"中文abc混合" -> "abc"）
+        return bad, None
+    raws: Dict[str, bytes] = {}
+
+    def recover(wrong: str) -> bytes:
+        raw = raws.get(wrong)
+        if raw is None:
+            raw = _recover_bytes(bad, wrong)
+            for other in raws.values():
+                if other == raw:
+                    raw = other
+                    break
+            raws[wrong] = raw
+        return raw
+
     pairs = pairs_for_mode(mode)
+    best_pair = None
+    tried: Set[Tuple[int, str]] = set()
     try:
-        primary = bad.encode("cp437", errors="ignore").decode("gbk", errors="ignore")
+        raw = recover("cp437")
+        primary = raw.decode("gbk", errors="ignore")
+        tried.add((id(raw), _codec_name("gbk")))
         best = primary or bad
+        if primary:
+            best_pair = ("cp437", "gbk")
     except Exception:
         best = bad
     best_score = cjk_ratio(best)
-    if best != bad and not looks_mojibake(best):
-        return best
+    trace_event("candidate", "reverse", pair="cp437>gbk", score=round(best_score, 4))
+    # 等同 not looks_mojibake(best)，沿用已算好的分數
+    if best != bad and (best.isascii() or best_score >= 0.02):
+        return best, best_pair
+    if best == bad:
+        best_pair = None
     for wrong, right in pairs:
         try:
-            t = bad.encode(wrong, errors="ignore").decode(right, errors="ignore")
+            raw = recover(wrong)
+            key = (id(raw), _codec_name(right))
+            if key in tried:
+                continue   # 結果與先前某個候選完全相同，分數不可能更高
+            tried.add(key)
+            if len(raw) > REVERSE_PREFIX_BYTES and best_score > REVERSE_PRUNE_MARGIN:
+                head = raw[:REVERSE_PREFIX_BYTES].decode(right, errors="ignore")
+                head_score = cjk_ratio(head)
+                if head_score + REVERSE_PRUNE_MARGIN < best_score:
+                    trace_event("candidate", "reverse", pair=f"{wrong}>{right}", score=round(head_score, 4), pruned=True)
+                    continue
+            t = raw.decode(right, errors="ignore")
             score = cjk_ratio(t)
+            trace_event("candidate", "reverse", pair=f"{wrong}>{right}", score=round(score, 4))
             if score > best_score:
-                best, best_score = t, score
+                best, best_score, best_pair = t, score, (wrong, right)
         except Exception:
             continue
-    return best
+    return best, best_pair
+
+def transform_string(bad: str, mode: str) -> str:
+    # 儲存格/run/檔名常大量重複（表頭、品名、樣板句），同樣的字串只逆轉一次
+    if len(bad) > TRANSFORM_CACHE_MAX_CHARS:
+        return reverse_mojibake(bad, mode)[0]
+    key = (bad, mode)
+    fixed = _TRANSFORM_CACHE.get(key, _MISSING)
+    if fixed is _MISSING:
+        fixed = reverse_mojibake(bad, mode)[0]
+        _TRANSFORM_CACHE.put(key, fixed)
+    return fixed
+
+def transform_many(values: List[str], mode: str, label: str = "解碼檢測") -> List[str]:
+    """逐一 transform_string（XLSX 儲存格、DOCX run）；整份文件只回報一組進度：已完成數 / 總數"""
+    hook = PROGRESS_HOOK
+    if hook is None:
+        return [transform_string(v, mode) for v in values]
+    total = max(1, len(values))
+    hook("begin", total=total, label=label)
+    out = []
+    with muted_progress():
+        for i, v in enumerate(values, 1):
+            out.append(transform_string(v, mode))
+            hook("tick", i=i, total=total)
+    hook("tick", i=total, total=total)
+    hook("end")
+    return out
 
 # ---------- 檔名安全修復 ----------
 def safe_fix_stem(stem: str, mode: str) -> str:
+    key = (stem, mode)
+    fixed = _STEM_CACHE.get(key, _MISSING)
+    if fixed is _MISSING:
+        fixed = _safe_fix_stem(stem, mode)
+        _STEM_CACHE.put(key, fixed)
+    return fixed
+
+def _safe_fix_stem(stem: str, mode: str) -> str:
     if not looks_mojibake(stem):
         return stem
     fixed = transform_string(stem, mode)
@@ -152,152 +757,1336 @@ def safe_fix_stem(stem: str, mode: str) -> str:
         return fixed
     return stem
 
-def build_fixed_name(path: Path, mode: str) -> Path:
+def build_fixed_name(path: Path, mode: str, reserved: Optional[Set[Path]] = None) -> Path:
+    """reserved：同一批次已分配的輸出名稱（尚未寫出），分配後會加入其中"""
     parent, stem, suffix = path.parent, path.stem, path.suffix
     fixed_stem_out = safe_fix_stem(stem, mode)
     candidate = parent / f"{fixed_stem_out}_fixed{suffix}"
     i = 1
-    while candidate.exists():
+    while candidate.exists() or (reserved is not None and candidate in reserved):
         candidate = parent / f"{fixed_stem_out}_fixed_{i}{suffix}"
         i += 1
+    if reserved is not None:
+        reserved.add(candidate)
     return candidate
 
+class FixedNameIndex:
+    """批次用的輸出檔名分配：每個資料夾只掃描一次（os.scandir），之後在記憶體中找空號，
+    取代 build_fixed_name 逐一 exists() 探測（資料夾累積大量 _fixed_N 時差很多）"""
+    def __init__(self):
+        self._names: Dict[Path, Set[str]] = {}
+        self._next: Dict[Tuple[Path, str, str], int] = {}   # 同一檔名下次從第幾號找起
+
+    def names(self, parent: Path) -> Set[str]:
+        names = self._names.get(parent)
+        if names is None:
+            try:
+                with os.scandir(parent) as it:
+                    names = {os.path.normcase(e.name) for e in it}
+            except OSError:
+                names = set()
+            self._names[parent] = names
+        return names
+
+    def exists(self, path: Path) -> bool:
+        return os.path.normcase(path.name) in self.names(path.parent)
+
+    def allocate(self, path: Path, mode: str) -> Path:
+        parent, suffix = path.parent, path.suffix
+        stem = safe_fix_stem(path.stem, mode)
+        names = self.names(parent)
+        key = (parent, stem, suffix)
+        i = self._next.get(key, 0)
+        while True:
+            name = f"{stem}_fixed{suffix}" if i == 0 else f"{stem}_fixed_{i}{suffix}"
+            i += 1
+            if os.path.normcase(name) not in names:
+                break
+        self._next[key] = i
+        names.add(os.path.normcase(name))
+        return parent / name
+
 # ---------- bytes → 最佳文本（含進度回拋） ----------
-def decode_bytes_best(b: bytes, mode: str) -> Tuple[str, str]:
+class DecodeResult(NamedTuple):
+    text: str
+    tag: str
+    plan: Tuple[str, ...]   # ("bytes", enc) / ("mojibake", wrong, re_wrong, right) / ("fallback", enc)
+    confidence: float = 1.0
+
+_BOMS = [(codecs.BOM_UTF8, "utf-8"), (codecs.BOM_UTF16_LE, "utf-16-le"), (codecs.BOM_UTF16_BE, "utf-16-be")]
+
+def _decode_strict(b: bytes, enc: str, final: bool = True) -> str:
+    if final:
+        return b.decode(enc)
+    # 樣本可能切在多位元組字元中間：尾端不完整的序列交給增量解碼器暫存即可
+    return codecs.getincrementaldecoder(enc)().decode(b, final=False)
+
+def _apply_plan(b: bytes, plan: Tuple[str, ...], final: bool = True) -> str:
+    if plan[0] == "bytes":
+        return _decode_strict(b, plan[1], final)
+    if plan[0] == "mojibake":
+        wrong, re_wrong, right = plan[1], plan[2], plan[3]
+        s = b.decode(wrong, errors="ignore")
+        return s.encode(re_wrong, errors="ignore").decode(right, errors="ignore") if right else s
+    return b.decode(plan[1], errors="ignore")
+
+def _sample_windows(b: bytes) -> List[bytes]:
+    """平均分佈於整個 buffer 的取樣視窗；小檔直接整份回傳"""
+    n, size = DETECT_SAMPLE_WINDOWS, DETECT_WINDOW_BYTES
+    if len(b) <= n * size * 2:
+        return [b]
+    step = ((len(b) - size) // (n - 1)) & ~1
+    return [b[i * step:i * step + size] for i in range(n)]
+
+# 切點放在換行之後：GBK/GB18030/Big5/Shift-JIS/EUC-JP/UTF-8 的多位元組字元都不含 0x0A；
+# 附近沒有換行時退而切在 0x00-0x2F 之後（單位元組字元，不會是任何候選編碼的後續位元組，GB18030 四位元組的 0x30-0x39 也避開了）；
+# UTF-8 可自我同步，任何非延續位元組（0x80-0xBF 以外）之前都能切
+_SAFE_CUT_RE = re.compile(rb"[\x00-\x2f]")
+_UTF8_LEAD_RE = re.compile(rb"[^\x80-\xbf]")
+
+def _trim_window(w: bytes) -> bytes:
+    """把視窗兩端修到字元邊界：從第一個、到最後一個 0x00-0x2F 位元組之後為止（這類位元組不會是
+    GBK/GB18030/Big5/Shift-JIS/EUC-JP/UTF-8 的後續位元組）。找不到時原樣回傳"""
+    head = _SAFE_CUT_RE.search(w)
+    if head is None:
+        return w
+    tail = max(w.rfind(bytes([c])) for c in range(0x30))
+    return w[head.end():tail + 1] if tail >= head.end() else w
+
+def _candidate_score(s: str) -> float:
+    return cjk_ratio(s) - (0.02 if looks_mojibake(s) else 0.0)
+
+def _confidence(scores: List[float]) -> float:
+    """第一名領先第二名 0.05（CJK 比例）以上即視為完全確定"""
+    if len(scores) < 2:
+        return 1.0
+    return round(min(1.0, max(0.0, scores[0] - scores[1]) * 20), 3)
+
+def decode_bytes_detail(b: bytes, mode: str, final: bool = True) -> DecodeResult:
+    """分層偵測：BOM → 純 ASCII → 合法 UTF-8 → 取樣評分候選，最後只以勝出者完整解碼一次。
+    final=False 表示 b 只是檔案開頭的樣本，結尾不完整的字元不視為錯誤"""
+    if TRACE_SINK is None:
+        return _decode_bytes_detail(b, mode, final)
+    with trace_span("decode", bytes=len(b), mode=mode) as sp:
+        result = _decode_bytes_detail(b, mode, final)
+        sp.set(tag=result.tag, confidence=result.confidence)
+        return result
+
+DIRECT_DECODE_MARGIN = 0.01        # 直接解碼與逆轉候選分數相差在此之內時，採用直接解碼
+UTF8_REVERSE_MARGIN = 0.05          # 合法 UTF-8 逆轉後 CJK 比例至少要多這麼多，才視為以 UTF-8 存下的亂碼
+UTF8_REVERSE_PROBE_CHARS = 64 * 1024
+
+def _utf8_mojibake_pair(s: str, mode: str, final: bool = True) -> Optional[Tuple[str, str]]:
+    """合法 UTF-8 解出的 s 若其實是亂碼（以 UTF-8 存下的 mojibake），回傳逆轉對。
+    帶重音的拉丁文等正常文字也「逆轉」得出零星 CJK，但過程會掉位元組或解不開；
+    只接受 wrong 逐字還原無損、right 嚴格解碼成功，且 CJK 比例明顯較高的逆轉對"""
+    probe = s[:UTF8_REVERSE_PROBE_CHARS]
+    final = final and len(probe) == len(s)
+    floor = _candidate_score(probe) + UTF8_REVERSE_MARGIN
+    raws: Dict[str, bytes] = {}
+    best, best_score = None, floor
+    for wrong, right in pairs_for_mode(mode):
+        raw = raws.get(wrong)
+        if raw is None:
+            raw = raws[wrong] = _recover_bytes(probe, wrong)
+        if len(raw) != len(probe):
+            continue   # 單位元組編碼逐字對應：少了位元組表示有字元不屬於 wrong
+        try:
+            score = _candidate_score(_decode_strict(raw, right, final))
+        except (UnicodeDecodeError, LookupError):
+            continue
+        if score >= best_score:
+            best, best_score = (wrong, right), score
+    return best
+
+def _decode_bytes_detail(b: bytes, mode: str, final: bool) -> DecodeResult:
     global PROGRESS_HOOK
-    candidates = []
     encs = enc_candidates_for_mode(mode)
+
+    # 第一層：BOM / 純 ASCII / 合法 UTF-8，直接定案
+    for bom, enc in _BOMS:
+        if b.startswith(bom) and enc in encs:
+            try:
+                return DecodeResult(_decode_strict(b, enc, final), f"bytes→{enc}", ("bytes", enc))
+            except Exception:
+                break
+    if b.isascii() and b"\x00" not in b:
+        return DecodeResult(b.decode("ascii"), "bytes→utf-8", ("bytes", "utf-8"))
+    try:
+        s = _decode_strict(b, "utf-8", final)
+    except Exception:
+        s = None
+    if s is not None:
+        # 嚴格合法的多位元組 UTF-8 幾乎不會是巧合：沒有 CJK 的正常文字（帶重音的拉丁文、西里爾文等）也直接採用；
+        # 只有逆轉後明顯更好且可無損還原時，才視為以 UTF-8 存下的亂碼並逆轉
+        pair = _utf8_mojibake_pair(s, mode, final) if looks_mojibake(s) else None
+        if pair is None:
+            return DecodeResult(s, "bytes→utf-8", ("bytes", "utf-8"))
+        plan = ("mojibake", "utf-8") + pair
+        return DecodeResult(_apply_plan(b, plan, final), "mojibake(utf-8→*)", plan)
+    if b"\x00" not in b:
+        # 沒有 BOM 的 UTF-16 文字必含 0x00（換行、空白、ASCII 的高位元組）；沒有就別讓它靠亂湊的 CJK 勝出
+        encs = [e for e in encs if not e.startswith("utf-16")]
+
+    # 第二層：在分層取樣上為各候選評分（小檔的樣本就是整份，解碼結果可直接沿用）
+    windows = _sample_windows(b)
+    sampled = len(windows) > 1
+    # 視窗切在多位元組字元中間時，直接解碼會多出替代字元、逆轉路徑卻以 ignore 免罰；
+    # 修到字元邊界讓兩種候選在同樣的位元組上比較（UTF-16 仍用原視窗，位移已是偶數）
+    trimmed = [_trim_window(w) for w in windows] if sampled else windows
     wrongs = ["latin1", "cp1252", "cp437"]
-    total_steps = len(encs) + len(wrongs)
+    total_steps = len(encs) + len(wrongs) + 1
     step = 0
     if PROGRESS_HOOK:
         PROGRESS_HOOK("begin", total=total_steps, label="解碼檢測")
+    candidates = []   # (score, tag, plan, 整份文字或 None)
     for enc in encs:
         try:
-            s = b.decode(enc)
-            candidates.append((s, f"bytes→{enc}"))
+            if sampled:
+                s = "".join(w.decode(enc, errors="replace")
+                            for w in (windows if enc.startswith("utf-16") else trimmed))
+                score = _candidate_score(s) - s.count("\ufffd") / max(1, len(s))
+                candidates.append((score, f"bytes→{enc}", ("bytes", enc), None))
+            else:
+                s = _decode_strict(b, enc, final)
+                candidates.append((_candidate_score(s), f"bytes→{enc}", ("bytes", enc), s))
+            trace_event("candidate", "decode", codec=enc, score=round(candidates[-1][0], 4), sampled=sampled)
         except Exception:
-            pass
+            trace_event("candidate", "decode", codec=enc, score=None, sampled=sampled)
         finally:
             step += 1
             if PROGRESS_HOOK: PROGRESS_HOOK("tick", i=step, total=total_steps)
     for wrong in wrongs:
         try:
-            s_bad = b.decode(wrong, errors="ignore")
-            s_fix = transform_string(s_bad, mode)
-            candidates.append((s_fix, f"mojibake({wrong}→*)"))
+            s_bad = b"".join(trimmed).decode(wrong, errors="ignore")
+            s_fix, pair = reverse_mojibake(s_bad, mode)
+            plan = ("mojibake", wrong) + (pair or ("", ""))
+            candidates.append((_candidate_score(s_fix), f"mojibake({wrong}→*)", plan,
+                               None if sampled else s_fix))
+            trace_event("candidate", "decode", codec=wrong, pair=f"{plan[2]}>{plan[3]}" if pair else None,
+                        score=round(candidates[-1][0], 4), sampled=sampled)
         except Exception:
             pass
         finally:
             step += 1
             if PROGRESS_HOOK: PROGRESS_HOOK("tick", i=step, total=total_steps)
+
+    # 第三層：依分數排序（同分保留原本候選順序），以勝出者完整解碼一次；失敗才換下一名。
+    # 「以 wrong 讀入再逆轉」和直接以 right 解碼常得到同一份文字，差距在 DIRECT_DECODE_MARGIN 內時優先直接解碼
+    ranked = sorted(((score + (DIRECT_DECODE_MARGIN if plan[0] == "bytes" else 0.0), tag, plan, text)
+                     for score, tag, plan, text in candidates), key=lambda c: -c[0])
+    result = None
+    for k, (score, tag, plan, text) in enumerate(ranked):
+        try:
+            if text is None:
+                text = _apply_plan(b, plan, final)
+        except Exception:
+            continue
+        result = DecodeResult(text, tag, plan, _confidence([c[0] for c in ranked[k:]]))
+        break
     if PROGRESS_HOOK:
+        PROGRESS_HOOK("tick", i=total_steps, total=total_steps)
         PROGRESS_HOOK("end")
+    if result is not None:
+        return result
+    try:
+        s = b.decode("latin1", errors="ignore")
+        return DecodeResult(s, "fallback: latin1", ("fallback", "latin1"), 0.0)
+    except Exception:
+        return DecodeResult("", "fallback: <unreadable>", ("fallback", "latin1"), 0.0)
+
+def decode_bytes_best(b: bytes, mode: str) -> Tuple[str, str]:
+    r = decode_bytes_detail(b, mode)
+    return r.text, r.tag
+
+def plan_decoder(plan: Tuple[str, ...]) -> Callable[..., str]:
+    """依 decode_bytes_detail 選出的 plan 建立增量解碼器：fn(block, final=False) -> str"""
+    kind = plan[0]
+    if kind == "bytes":
+        # 串流無法回頭改選其他編碼，後段遇到壞位元組時以替代字元保留位置
+        return codecs.getincrementaldecoder(plan[1])(errors="replace").decode
+    if kind == "mojibake":
+        wrong, re_wrong, right = plan[1], plan[2], plan[3]
+        if not right:
+            return lambda block, final=False: block.decode(wrong, errors="ignore")
+        # re_wrong 為單位元組編碼，可逐字轉換；wrong（可能是 UTF-8）與 right 需要保留跨塊狀態
+        wrong_dec = codecs.getincrementaldecoder(wrong)(errors="ignore")
+        right_dec = codecs.getincrementaldecoder(right)(errors="ignore")
+        def _decode(block: bytes, final: bool = False) -> str:
+            raw = wrong_dec.decode(block, final).encode(re_wrong, errors="ignore")
+            return right_dec.decode(raw, final)
+        return _decode
+    return lambda block, final=False: block.decode(plan[1], errors="ignore")
+
+# ---------- 翻譯快取（記憶體 LRU + SQLite 持久層） ----------
+TRANSLATE_CACHE_VERSION = 1                        # 分段或翻譯流程改變時加一，舊資料自然不再命中
+TRANSLATE_CACHE_ENV = "TEXTFIX_TRANSLATION_CACHE"  # 快取檔路徑；設為 off / 0 / 空字串 即停用
+TRANSLATE_CACHE_MAX_BYTES = 256 * 1024 * 1024      # 原文 + 譯文（UTF-8）總量上限
+TRANSLATE_CACHE_MAX_AGE_DAYS = 180                 # 超過此天數未使用即淘汰
+TRANSLATE_CACHE_EVICT_EVERY = 2000                 # 每寫入這麼多筆檢查一次容量
+_SQL_BATCH = 500                                   # 單一 IN (...) 查詢的參數數量
+
+def user_translation_cache_path() -> Path:
+    """使用者快取資料夾下的預設位置（不看環境變數）"""
+    base = os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(base) / "textfix" / "translations.sqlite3"
 
-    if not candidates:
+def default_translation_cache_path() -> Optional[Path]:
+    v = os.environ.get(TRANSLATE_CACHE_ENV)
+    if v is not None:
+        if v.strip().lower() in ("", "0", "off", "none", "false"):
+            return None
+        return Path(v).expanduser()
+    return user_translation_cache_path()
+
+class TranslationStore:
+    """SQLite 翻譯快取。key 為 (版本, 後端, 來源模式, 目標語言, 原文) 的 sha256，
+    另存各欄位以便檢視；依最後使用時間做逾期與容量淘汰。
+    每個行程各自連線（WAL，可多行程同時讀寫）；SQLite 出錯只會讓快取不命中，不影響翻譯本身"""
+    def __init__(self, path: Path, max_bytes: int = TRANSLATE_CACHE_MAX_BYTES,
+                 max_age_days: float = TRANSLATE_CACHE_MAX_AGE_DAYS):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.max_age = max_age_days * 86400
+        self._conn = None
+        self._pid = None
+        self._broken = False
+        self._writes = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.stores = self.evictions = 0
+
+    @staticmethod
+    def key(backend: str, mode: str, target: str, seg: str) -> bytes:
+        head = f"{TRANSLATE_CACHE_VERSION}\x00{backend}\x00{mode}\x00{target}\x00".encode("utf-8")
+        return hashlib.sha256(head + seg.encode("utf-8", "surrogatepass")).digest()
+
+    def _connect(self):
+        if self._broken:
+            return None
+        if self._conn is not None and self._pid == os.getpid():
+            return self._conn
+        import sqlite3
         try:
-            s = b.decode("latin1", errors="ignore")
-            return s, "fallback: latin1"
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS translations ("
+                         "key BLOB PRIMARY KEY, backend TEXT NOT NULL, mode TEXT NOT NULL, "
+                         "target TEXT NOT NULL, version INTEGER NOT NULL, value TEXT NOT NULL, "
+                         "size INTEGER NOT NULL, created REAL NOT NULL, used REAL NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS translations_used ON translations(used)")
         except Exception:
-            return "", "fallback: <unreadable>"
+            self._broken = True
+            return None
+        self._conn, self._pid = conn, os.getpid()
+        self._evict(conn)
+        return conn
 
-    best_s, best_tag, best_score = "", "", -1.0
-    for s, tag in candidates:
-        score = cjk_ratio(s) - (0.02 if looks_mojibake(s) else 0.0)
-        if score > best_score:
-            best_s, best_tag, best_score = s, tag, score
-    return best_s, best_tag
+    def _evict(self, conn):
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                n = conn.execute("DELETE FROM translations WHERE used < ?",
+                                 (time.time() - self.max_age,)).rowcount
+                total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM translations").fetchone()[0]
+                if total > self.max_bytes:
+                    # 刪到上限的 90%，避免之後每次寫入都觸發
+                    excess = total - self.max_bytes * 0.9
+                    doomed = []
+                    for k, size in conn.execute("SELECT key, size FROM translations ORDER BY used"):
+                        doomed.append((k,))
+                        excess -= size
+                        if excess <= 0:
+                            break
+                    conn.executemany("DELETE FROM translations WHERE key = ?", doomed)
+                    n += len(doomed)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            self.evictions += max(0, n)
+        except Exception:
+            pass
+
+    def get_many(self, backend: str, mode: str, target: str, segs: Iterable[str]) -> Dict[str, str]:
+        """一次查整份文件的片段；回傳命中的 {原文: 譯文}，並更新其最後使用時間"""
+        keys = {self.key(backend, mode, target, s): s for s in segs}
+        found: Dict[str, str] = {}
+        if not keys:
+            return found
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return found
+            try:
+                ks = list(keys)
+                hit = []
+                for i in range(0, len(ks), _SQL_BATCH):
+                    part = ks[i:i + _SQL_BATCH]
+                    q = "SELECT key, value FROM translations WHERE key IN (%s)" % ",".join("?" * len(part))
+                    for k, v in conn.execute(q, part):
+                        found[keys[bytes(k)]] = v
+                        hit.append(k)
+                if hit:
+                    now = time.time()
+                    conn.executemany("UPDATE translations SET used = ? WHERE key = ?", [(now, k) for k in hit])
+            except Exception:
+                pass
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, backend: str, mode: str, target: str, items: Dict[str, str]):
+        if not items:
+            return
+        now = time.time()
+        rows = [(self.key(backend, mode, target, s), backend, mode, target, TRANSLATE_CACHE_VERSION, v,
+                 len(s.encode("utf-8", "surrogatepass")) + len(v.encode("utf-8", "surrogatepass")), now, now)
+                for s, v in items.items()]
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    conn.executemany("INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+            except Exception:
+                return
+            self.stores += len(rows)
+            self._writes += len(rows)
+            if self._writes >= TRANSLATE_CACHE_EVICT_EVERY:
+                self._writes = 0
+                self._evict(conn)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"path": str(self.path), "enabled": not self._broken, "hits": self.hits,
+                "misses": self.misses, "stores": self.stores, "evictions": self.evictions}
+
+_TRANSLATE_CACHE = LRUCache(TRANSFORM_CACHE_MAX_ENTRIES, TRANSFORM_CACHE_MAX_BYTES)
+_TRANSLATION_STORE: Optional[TranslationStore] = None
+_TRANSLATION_STORE_READY = False
+
+def configure_translation_cache(path: Optional[Path]):
+    """指定持久快取位置（None 停用）；寫回環境變數，讓批次的子行程沿用同一設定"""
+    global _TRANSLATION_STORE, _TRANSLATION_STORE_READY
+    if _TRANSLATION_STORE is not None:
+        _TRANSLATION_STORE.close()
+    os.environ[TRANSLATE_CACHE_ENV] = str(path) if path else "off"
+    _TRANSLATION_STORE = TranslationStore(path) if path else None
+    _TRANSLATION_STORE_READY = True
+
+def get_translation_store() -> Optional[TranslationStore]:
+    global _TRANSLATION_STORE, _TRANSLATION_STORE_READY
+    if not _TRANSLATION_STORE_READY:
+        path = default_translation_cache_path()
+        _TRANSLATION_STORE = TranslationStore(path) if path else None
+        _TRANSLATION_STORE_READY = True
+    return _TRANSLATION_STORE
+
+def _cache_lookup(ns: Tuple[str, str, str], segs: Iterable[str]) -> Dict[str, str]:
+    """先查記憶體 LRU，未命中的再整批查 SQLite；ns = (後端, 來源模式, 目標語言)"""
+    found: Dict[str, str] = {}
+    missing = []
+    for s in dict.fromkeys(segs):
+        v = _TRANSLATE_CACHE.get((ns, s), _MISSING)
+        if v is _MISSING:
+            missing.append(s)
+        else:
+            found[s] = v
+    store = get_translation_store()
+    if store is not None and missing:
+        for s, v in store.get_many(*ns, missing).items():
+            _TRANSLATE_CACHE.put((ns, s), v)
+            found[s] = v
+    return found
+
+def _cache_store(ns: Tuple[str, str, str], items: Dict[str, str], persist: bool = True):
+    for s, v in items.items():
+        _TRANSLATE_CACHE.put((ns, s), v)
+    store = get_translation_store()
+    if persist and store is not None:
+        store.put_many(*ns, items)
+
+# ---------- OpenCC 轉換器（每個行程每種設定只建一次） ----------
+OPENCC_BULK_SEP = "\x00"           # 整批轉換的片段分隔：不在任何詞條內，詞組不會跨片段比對
+OPENCC_BULK_CHARS = 256 * 1024     # 每次合併轉換的字數上限
+_OPENCC_LOCK = threading.Lock()
+_OPENCC_CONVERTERS: Dict[str, Optional["OpenCCConverter"]] = {}
+
+class OpenCCConverter:
+    """行程內共用的 OpenCC 轉換器。convert 以鎖序列化：reimplemented 版第一次轉換時才載入字典、
+    過程不是執行緒安全的，而且純 Python 實作並行也不會更快"""
+    def __init__(self, config: str, cc):
+        self.config = config
+        self._cc = cc
+        self._lock = threading.Lock()
+
+    def __call__(self, text: str) -> str:
+        with self._lock:
+            return self._cc.convert(text)
+
+    def convert_many(self, texts: List[str]) -> List[str]:
+        """整批轉換：以 OPENCC_BULK_SEP 串接，每 OPENCC_BULK_CHARS 字轉一次再切回。
+        片段本身含分隔字元或切回的段數不符時，該批改為逐段轉換"""
+        out: List[str] = []
+        lo = 0
+        while lo < len(texts):
+            hi, size = lo, 0
+            while hi < len(texts) and (hi == lo or size + len(texts[hi]) <= OPENCC_BULK_CHARS):
+                size += len(texts[hi]) + 1
+                hi += 1
+            group = texts[lo:hi]
+            parts = None
+            if len(group) > 1 and not any(OPENCC_BULK_SEP in t for t in group):
+                parts = self(OPENCC_BULK_SEP.join(group)).split(OPENCC_BULK_SEP)
+            if parts is None or len(parts) != len(group):
+                parts = [self(t) for t in group]
+            out.extend(parts)
+            lo = hi
+        return out
+
+def get_opencc_converter(config: str) -> Optional[OpenCCConverter]:
+    """config（"t2s"、"s2t"…）對應的共用轉換器；未安裝 OpenCC 或建立失敗時回 None（結果同樣會記住）"""
+    conv = _OPENCC_CONVERTERS.get(config, _MISSING)
+    if conv is _MISSING:
+        with _OPENCC_LOCK:
+            conv = _OPENCC_CONVERTERS.get(config, _MISSING)
+            if conv is _MISSING:
+                OpenCC = get_opencc_class()
+                try:
+                    conv = OpenCCConverter(config, OpenCC(config)) if OpenCC else None
+                except Exception:
+                    conv = None
+                _OPENCC_CONVERTERS[config] = conv
+    return conv
+
+def convert_many(texts: Iterable[str], config: str) -> List[str]:
+    """以共用轉換器整批繁簡轉換，回傳同長度、同順序的結果；沒有 OpenCC 時原樣回傳"""
+    texts = list(texts)
+    conv = get_opencc_converter(config)
+    return conv.convert_many(texts) if conv is not None and texts else texts
+
+def _reset_opencc_locks():
+    # fork 出來的子行程可能複製到別的執行緒正持有的鎖，換成新鎖（轉換器本身沿用，不必重載字典）
+    global _OPENCC_LOCK
+    _OPENCC_LOCK = threading.Lock()
+    for conv in _OPENCC_CONVERTERS.values():
+        if conv is not None:
+            conv._lock = threading.Lock()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_opencc_locks)
 
 # ---------- 翻譯（加入分段進度回拋） ----------
-_TRANSLATE_CACHE: Dict[Tuple[str, str], str] = {}
+TRANSLATE_CHUNK_CHARS = 4000
+# 批次翻譯：每段片段前放一行編號標記，翻譯後依標記切回；標記數不符時改逐段翻譯
+_BATCH_MARK = "[[{}]]"
+_BATCH_MARK_RE = re.compile(r"\s*\[\[\s*(\d+)\s*\]\]\s*")
+
+# 外語翻譯的並行與限速（每個行程各自計算；多行程批次時總速率約為行程數倍）
+TRANSLATE_CONCURRENCY = int(os.environ.get("TEXTFIX_TRANSLATE_CONCURRENCY") or 4)
+TRANSLATE_RATE = float(os.environ.get("TEXTFIX_TRANSLATE_RATE") or 5.0)   # 每秒請求數；0 = 不限速
+TRANSLATE_RETRIES = 3           # 單次請求失敗後的重試次數
+TRANSLATE_BACKOFF = 0.5         # 第一次重試前的等待秒數，之後每次加倍（含隨機抖動）
+TRANSLATE_BACKOFF_MAX = 30.0
+
+class TokenBucket:
+    """令牌桶限速：平均 rate 次/秒，最多累積 burst 次；可跨執行緒共用"""
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+                self._stamp = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+_RATE_LIMITER = TokenBucket(TRANSLATE_RATE, TRANSLATE_CONCURRENCY)
 
-def translate_text(text: str, target_lang: str) -> str:
+def configure_translation_pool(concurrency: Optional[int] = None, rate: Optional[float] = None):
+    """調整外語翻譯的並行數與每秒請求數；寫回環境變數，讓批次的子行程沿用"""
+    global TRANSLATE_CONCURRENCY, TRANSLATE_RATE, _RATE_LIMITER
+    if concurrency is not None:
+        TRANSLATE_CONCURRENCY = max(1, int(concurrency))
+        os.environ["TEXTFIX_TRANSLATE_CONCURRENCY"] = str(TRANSLATE_CONCURRENCY)
+    if rate is not None:
+        TRANSLATE_RATE = max(0.0, float(rate))
+        os.environ["TEXTFIX_TRANSLATE_RATE"] = str(TRANSLATE_RATE)
+    _RATE_LIMITER = TokenBucket(TRANSLATE_RATE, TRANSLATE_CONCURRENCY)
+
+TRANSLATOR_FACTORY: Optional[Callable[[str], Any]] = None
+
+def set_translator_factory(fn: Optional[Callable[[str], Any]]):
+    """替換外語翻譯器的建立方式（fn(target) -> 具 translate(str) 的物件），供測試或離線環境使用"""
+    global TRANSLATOR_FACTORY
+    TRANSLATOR_FACTORY = fn
+
+def make_translator(target_lang: str):
+    if TRANSLATOR_FACTORY is not None:
+        return TRANSLATOR_FACTORY(target_lang)
+    GoogleTranslator = get_google_translator_class()
+    if GoogleTranslator is None:
+        return None
+    return GoogleTranslator(source="auto", target=target_lang)
+
+class _ThreadLocalTranslator:
+    """每個執行緒各用一個翻譯器實例（GoogleTranslator 會把請求參數存在實例上，不能共用）"""
+    def __init__(self, first, target_lang: str):
+        self.target_lang = target_lang
+        self._local = threading.local()
+        self._local.t = first
+
+    def __call__(self, seg: str) -> str:
+        t = getattr(self._local, "t", None)
+        if t is None:
+            t = self._local.t = make_translator(self.target_lang)
+        return t.translate(seg)
+
+def _translation_backend(target_lang: str, translator: Any = None) -> Optional[Tuple[str, Callable[[str], str], bool]]:
+    """回傳 (後端名稱, 轉換函式, 是否為遠端服務)；名稱會寫進快取 key，區分 OpenCC 設定與外語翻譯器。
+    注入的 translator 會被多個執行緒同時呼叫，需自行確保可並行（或把並行數設為 1）"""
+    if translator is not None:
+        return type(translator).__name__, translator.translate, True
+    if target_lang in ("zh-CN", "zh-TW"):
+        config = "t2s" if target_lang == "zh-CN" else "s2t"
+        conv = get_opencc_converter(config)
+        if conv is not None:
+            return f"opencc:{config}", conv, False
+    try:
+        gt = make_translator(target_lang)
+    except Exception:
+        return None
+    if gt is None:
+        return None
+    return type(gt).__name__, _ThreadLocalTranslator(gt, target_lang), True
+
+def _call_backend(fn: Callable[[str], str], seg: str, remote: bool = False) -> Tuple[str, bool]:
+    """(結果, 是否成功)；遠端服務先取令牌，例外時退避重試。最終失敗回原文，且不寫入持久快取"""
+    attempts = TRANSLATE_RETRIES + 1 if remote else 1
+    with trace_span("network" if remote else "opencc", chars=len(seg)) as sp:
+        for attempt in range(attempts):
+            if remote:
+                _RATE_LIMITER.acquire()
+            try:
+                out = fn(seg)
+            except Exception:
+                if attempt + 1 < attempts:
+                    delay = min(TRANSLATE_BACKOFF_MAX, TRANSLATE_BACKOFF * (2 ** attempt))
+                    time.sleep(delay * (0.5 + random.random()))
+                continue
+            sp.set(attempts=attempt + 1, ok=isinstance(out, str))
+            if not isinstance(out, str):
+                return seg, False
+            return out, True
+        sp.set(attempts=attempts, ok=False)
+        return seg, False
+
+def _run_translation_jobs(jobs: List[Callable[[], Any]], parallel: bool) -> List[Any]:
+    """執行一組翻譯工作，結果依原順序回傳。遠端工作以執行緒池並行，同時在途的數量不超過並行數；
+    進度 tick 只由呼叫端執行緒送出（暫停時不再派新工作，取消時丟棄尚未開始的）"""
+    global PROGRESS_HOOK
+    total = len(jobs)
+    results: List[Any] = [None] * total
+    workers = min(TRANSLATE_CONCURRENCY, total) if parallel else 1
+    if workers <= 1:
+        for i, job in enumerate(jobs, 1):
+            results[i - 1] = job()
+            if PROGRESS_HOOK: PROGRESS_HOOK("tick", i=i, total=total)
+        return results
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="translate")
+    try:
+        pending = {}
+        nxt = done = 0
+        while nxt < total or pending:
+            while nxt < total and len(pending) < workers:
+                pending[pool.submit(jobs[nxt])] = nxt
+                nxt += 1
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                results[pending.pop(fut)] = fut.result()
+                done += 1
+                if PROGRESS_HOOK: PROGRESS_HOOK("tick", i=done, total=total)
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+    return results
+
+# 內容定義分段：以整行/整句為單位裝箱，切點由單位內容的 crc32 決定（與位置無關），
+# 文件中間插入或刪除文字時，只有附近的分段改變，其餘分段仍可命中翻譯快取
+CHUNK_TARGET_CHARS = TRANSLATE_CHUNK_CHARS // 2   # 平均分段長度
+CHUNK_MIN_CHARS = TRANSLATE_CHUNK_CHARS // 8      # 分段至少累積這麼長才接受錨點
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[。！？；…])|(?<=[.!?;])(?=\s)")
+
+def _chunk_units(text: str, limit: int) -> Iterable[str]:
+    """切成整行；超長的行再依句末標點切，仍超長才硬切（不拆開 \\r\\n）"""
+    for line in text.splitlines(keepends=True):
+        if len(line) <= limit:
+            yield line
+            continue
+        for sent in _SENTENCE_SPLIT_RE.split(line):
+            while len(sent) > limit:
+                cut = limit - 1 if sent[limit - 1] == "\r" and sent[limit] == "\n" else limit
+                yield sent[:cut]
+                sent = sent[cut:]
+            if sent:
+                yield sent
+
+def _is_anchor(unit: str) -> bool:
+    # 單位越長越可能成為錨點，平均每 CHUNK_TARGET_CHARS 字出現一次，與行長分布無關
+    h = zlib.crc32(unit.encode("utf-8", "surrogatepass"))
+    return h < (len(unit) << 32) // CHUNK_TARGET_CHARS
+
+def chunk_text(text: str, limit: int = TRANSLATE_CHUNK_CHARS) -> List[str]:
+    """把 text 切成不超過 limit 字、且接起來等於原文的分段"""
+    chunks: List[str] = []
+    cur: List[str] = []
+    size = 0
+    for unit in _chunk_units(text, limit):
+        if cur and size + len(unit) > limit:
+            chunks.append("".join(cur))
+            cur, size = [], 0
+        cur.append(unit)
+        size += len(unit)
+        if size >= CHUNK_MIN_CHARS and _is_anchor(unit):
+            chunks.append("".join(cur))
+            cur, size = [], 0
+    if cur:
+        chunks.append("".join(cur))
+    return chunks or [""]
+
+def _split_edges(s: str) -> Tuple[str, str, str]:
+    """拆出前後空白：翻譯器常會吃掉頭尾空白（分段結尾的換行），寫回時補上原本的"""
+    core = s.strip()
+    if not core:
+        return s, "", ""
+    head = s[:len(s) - len(s.lstrip())]
+    tail = s[len(s.rstrip()):]
+    return head, core, tail
+
+def translate_text(text: str, target_lang: str, mode: str = "auto") -> str:
     global PROGRESS_HOOK
     if target_lang == "none" or not text:
         return text
-    if OpenCC and target_lang in ("zh-CN", "zh-TW"):
+    backend = _translation_backend(target_lang)
+    if backend is None:
+        return text
+    name, fn, remote = backend
+    ns = (name, mode, target_lang)
+    with trace_span("translate", backend=name, chars=len(text)) as sp:
         try:
-            cc = OpenCC("t2s" if target_lang == "zh-CN" else "s2t")
-            chunk = 4000
-            segs = [text[i:i+chunk] for i in range(0, len(text), chunk)] or [""]
-            total = len(segs)
-            if PROGRESS_HOOK: PROGRESS_HOOK("begin", total=total, label="中文轉換")
-            outs = []
-            for i, seg in enumerate(segs, 1):
-                outs.append(cc.convert(seg))
-                if PROGRESS_HOOK: PROGRESS_HOOK("tick", i=i, total=total)
-            if PROGRESS_HOOK: PROGRESS_HOOK("end")
-            return "".join(outs)
+            edges = [_split_edges(s) for s in chunk_text(text)]
+            known = _cache_lookup(ns, (e[1] for e in edges if e[1]))
+            todo = [c for c in dict.fromkeys(e[1] for e in edges if e[1]) if c not in known]
+            sp.set(segments=len(edges), cached=len(known), todo=len(todo))
+            label = "中文轉換" if not remote else "翻譯載入"
+            if PROGRESS_HOOK: PROGRESS_HOOK("begin", total=max(1, len(todo)), label=label)
+            outs = _run_translation_jobs([functools.partial(_call_backend, fn, s, remote) for s in todo], remote)
+            fresh: Dict[str, str] = {}
+            failed: Dict[str, str] = {}
+            for seg, (out, ok) in zip(todo, outs):
+                known[seg] = out
+                (fresh if ok else failed)[seg] = out
+            _cache_store(ns, fresh)
+            _cache_store(ns, failed, persist=False)
+            if PROGRESS_HOOK:
+                if not todo:
+                    PROGRESS_HOOK("tick", i=1, total=1)
+                PROGRESS_HOOK("end")
+            return "".join(head + known[core] + tail if core else head for head, core, tail in edges)
         except Exception:
-            pass
-    if GoogleTranslator:
+            return text
+
+def _pack_payloads(cores: List[str], limit: int) -> List[List[int]]:
+    """依序把片段裝進不超過 limit 字的批次（含標記）；單一片段超長則自成一批"""
+    batches: List[List[int]] = []
+    cur: List[int] = []
+    size = 0
+    for k, core in enumerate(cores):
+        cost = len(core) + len(_BATCH_MARK.format(len(cur))) + 2
+        if cur and size + cost > limit:
+            batches.append(cur)
+            cur, size = [], 0
+            cost = len(core) + len(_BATCH_MARK.format(0)) + 2
+        cur.append(k)
+        size += cost
+    if cur:
+        batches.append(cur)
+    return batches
+
+def _unpack_payload(translated: Any, n: int) -> Optional[List[str]]:
+    """依標記切回 n 段；標記缺漏、重複或順序不對就回 None"""
+    if not isinstance(translated, str):
+        return None
+    parts = _BATCH_MARK_RE.split(translated)
+    if len(parts) != 2 * n + 1 or parts[0].strip():
+        return None
+    if [int(x) for x in parts[1::2]] != list(range(n)):
+        return None
+    return parts[2::2]
+
+def _translate_fragment(fn: Callable[[str], str], core: str, remote: bool) -> Tuple[str, bool]:
+    if len(core) <= TRANSLATE_CHUNK_CHARS:
+        return _call_backend(fn, core, remote)
+    # 超長片段照 translate_text 的方式分段
+    outs = []
+    ok = True
+    for head, seg, tail in map(_split_edges, chunk_text(core)):
+        out, good = _call_backend(fn, seg, remote) if seg else ("", True)
+        outs.append(head + out + tail)
+        ok = ok and good
+    return "".join(outs), ok
+
+def _translate_batch(fn: Callable[[str], str], cores: List[str], remote: bool) -> List[Tuple[str, bool]]:
+    """翻譯一個批次；多片段時串成一次請求，標記對不上就在同一個工作內逐段重翻"""
+    if len(cores) > 1:
+        payload = "\n".join(_BATCH_MARK.format(j) + "\n" + core for j, core in enumerate(cores))
+        out, ok = _call_backend(fn, payload, remote)
+        outs = _unpack_payload(out, len(cores)) if ok else None
+        if outs is not None:
+            return [(o, True) for o in outs]
+    return [_translate_fragment(fn, core, remote) for core in cores]
+
+def _convert_batch(fn: Callable[[str], str], cores: List[str]) -> List[Tuple[str, bool]]:
+    """本機轉換一個批次：OpenCCConverter 走 convert_many 一次轉完；失敗時回原文且不寫入持久快取"""
+    with trace_span("opencc", chars=sum(map(len, cores)), fragments=len(cores)):
         try:
-            gt = GoogleTranslator(source="auto", target=target_lang)
-            chunk = 4000
-            segs = [text[i:i+chunk] for i in range(0, len(text), chunk)] or [""]
-            total = len(segs)
-            if PROGRESS_HOOK: PROGRESS_HOOK("begin", total=total, label="翻譯載入")
-            outs = []
-            for i, seg in enumerate(segs, 1):
-                key = (seg, target_lang)
-                if key in _TRANSLATE_CACHE:
-                    outs.append(_TRANSLATE_CACHE[key])
-                else:
-                    try:
-                        out = gt.translate(seg)
-                    except Exception:
-                        out = seg
-                    _TRANSLATE_CACHE[key] = out
-                    outs.append(out)
-                if PROGRESS_HOOK: PROGRESS_HOOK("tick", i=i, total=total)
-            if PROGRESS_HOOK: PROGRESS_HOOK("end")
-            return "".join(outs)
+            bulk = getattr(fn, "convert_many", None)
+            outs = bulk(cores) if bulk is not None else [fn(c) for c in cores]
+            return [(o, True) for o in outs]
         except Exception:
-            return text
-    return text
+            return [(c, False) for c in cores]
+
+def translate_many(texts: List[str], target_lang: str, translator: Any = None,
+                   mode: str = "auto") -> List[str]:
+    """批次翻譯多個片段（DOCX run、XLSX 儲存格），回傳同長度、同順序的結果。
+    片段去重並先整批查快取，其餘以編號標記串成 ≤ TRANSLATE_CHUNK_CHARS 字的批次並行送出，
+    往返次數約為片段數 / 批次容量；批次結果對不上標記時，該批改為逐段翻譯。
+    translator 可注入具 translate(str) 的物件（例如測試用替身）"""
+    global PROGRESS_HOOK
+    texts = list(texts)
+    if target_lang == "none" or not texts:
+        return texts
+    backend = _translation_backend(target_lang, translator)
+    if backend is None:
+        return texts
+    name, fn, remote = backend
+    ns = (name, mode, target_lang)
+
+    edges = [_split_edges(s if isinstance(s, str) else "") for s in texts]
+    known = _cache_lookup(ns, (e[1] for e in edges if e[1]))
+    cores = [c for c in dict.fromkeys(e[1] for e in edges if e[1]) if c not in known]
+
+    if remote:
+        batches = _pack_payloads(cores, TRANSLATE_CHUNK_CHARS)
+        label = "翻譯載入"
+    else:
+        # 本機轉換沒有往返成本：整份文件的片段合併成少數幾批，以共用轉換器一次轉完
+        batches = _pack_payloads(cores, OPENCC_BULK_CHARS)
+        label = "中文轉換"
+    with trace_span("translate", backend=name, fragments=len(texts), cached=len(known),
+                    todo=len(cores), batches=len(batches)):
+        if PROGRESS_HOOK: PROGRESS_HOOK("begin", total=max(1, len(batches)), label=label)
+        work = functools.partial(_translate_batch, fn, remote=remote) if remote else functools.partial(_convert_batch, fn)
+        outs = _run_translation_jobs([functools.partial(work, [cores[k] for k in batch]) for batch in batches], remote)
+        if PROGRESS_HOOK:
+            if not batches:
+                PROGRESS_HOOK("tick", i=1, total=1)
+            PROGRESS_HOOK("end")
+    fresh: Dict[str, str] = {}
+    failed: Dict[str, str] = {}
+    for batch, results in zip(batches, outs):
+        for k, (out, ok) in zip(batch, results):
+            (fresh if ok else failed)[cores[k]] = out
+    _cache_store(ns, fresh)
+    _cache_store(ns, failed, persist=False)
+    known.update(fresh)
+    known.update(failed)
+
+    result = []
+    for s, (head, core, tail) in zip(texts, edges):
+        result.append(head + known.get(core, core) + tail if core else s)
+    return result
+
+# ---------- 無變更時直接複製位元組 ----------
+FICLONE = 0x40049409   # linux/fs.h 的 _IOW(0x94, 9, int)：btrfs/XFS 等同一檔案系統內共用資料區塊
+
+def _clone_or_copy_range(src: Path, out: Path) -> Optional[str]:
+    """reflink → copy_file_range（資料不經過使用者空間）；都不支援時回 None"""
+    if sys.platform != "linux":
+        return None
+    try:
+        fsrc, fdst = open(src, "rb"), open(out, "wb")
+    except OSError:
+        return None
+    with fsrc, fdst:
+        try:
+            import fcntl
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+            return "reflink"
+        except (ImportError, OSError):
+            pass
+        if hasattr(os, "copy_file_range"):
+            try:
+                left = os.fstat(fsrc.fileno()).st_size
+                while left > 0:
+                    n = os.copy_file_range(fsrc.fileno(), fdst.fileno(), left)
+                    if n <= 0:
+                        break
+                    left -= n
+                if left <= 0:
+                    return "copy_file_range"
+            except OSError:
+                pass
+    return None
+
+def fast_copy(src: Path, out: Path) -> str:
+    """內容不需修改的檔案：以位元組層級複製代替重新序列化，回傳採用的方式（reflink/copy_file_range/copy2）。
+    中繼資料比照 shutil.copy2"""
+    with trace_span("copy") as sp:
+        method = _clone_or_copy_range(src, out)
+        if method is None:
+            shutil.copy2(src, out)
+            method = "copy2"
+        else:
+            shutil.copystat(src, out)
+        sp.set(method=method)
+    return method
+
+def _copy_result(src: Path, out: Path, tag: str) -> Tuple[bool, str, Path]:
+    try:
+        fast_copy(src, out)
+        return True, tag, out
+    except Exception as e:
+        return False, f"輸出失敗：{e}", out
+
+def _ooxml_text(el) -> str:
+    # 同 openpyxl 的 Text.content：<t> 加上各 <r><t>，不含注音 <rPh>
+    parts = []
+    for child in el:
+        tag = child.tag.rpartition("}")[2]
+        if tag == "t":
+            parts.append(child.text or "")
+        elif tag == "r":
+            parts.extend(t.text or "" for t in child if t.tag.rpartition("}")[2] == "t")
+    return "".join(parts)
+
+def xlsx_unchanged(src: Path, mode: str) -> bool:
+    """不經 openpyxl，直接掃 zip 內的共用字串表與工作表 XML，判斷修復後是否沒有任何儲存格會改變（不含翻譯）。
+    純 ASCII 字串不會被改動，只有非 ASCII 的才交給 transform_string；含非 ASCII 的公式或無法解析時一律回 False"""
+    import zipfile
+    from xml.etree.ElementTree import iterparse
+    try:
+        with zipfile.ZipFile(src) as z:
+            for name in z.namelist():
+                shared = name == "xl/sharedStrings.xml"
+                if not (shared or (name.startswith("xl/worksheets/") and name.endswith(".xml"))):
+                    continue
+                with z.open(name) as fp:
+                    for _, el in iterparse(fp):
+                        tag = el.tag.rpartition("}")[2]
+                        text = None
+                        if tag == "si" or tag == "is":
+                            text = _ooxml_text(el)
+                            if shared:
+                                text = text.replace("x005F_", "")
+                        elif tag == "f":
+                            if el.text and not el.text.isascii():
+                                return False
+                        elif tag == "c":
+                            if el.get("t") == "str" and el.find(el.tag[:-1] + "f") is None:
+                                text = el.findtext(el.tag[:-1] + "v")
+                            el.clear()
+                        elif tag == "row":
+                            el.clear()
+                        if text and not text.isascii() and transform_string(text, mode) != text:
+                            return False
+                        if tag == "si":
+                            el.clear()
+    except Exception:
+        return False
+    return True
 
 # ---------- 檔案處理 ----------
-def repair_text_to_new_file(src: Path, mode: str, target: str) -> Tuple[bool, str, Path]:
-    out = build_fixed_name(src, mode)
+def repair_text_to_new_file(src: Path, mode: str, target: str,
+                            out: Optional[Path] = None) -> Tuple[bool, str, Path]:
+    out = out or build_fixed_name(src, mode)
+    try:
+        size = src.stat().st_size
+    except Exception as e:
+        return False, f"無法讀取：{e}", out
+    if size >= STREAM_THRESHOLD_BYTES:
+        return repair_text_streaming(src, out, mode, target)
     try:
         b = src.read_bytes()
     except Exception as e:
         return False, f"無法讀取：{e}", out
-    fixed, tag = decode_bytes_best(b, mode)
-    fixed = translate_text(fixed, target)
+    det = decode_bytes_detail(b, mode)
+    fixed = translate_text(det.text, target, mode)
+    if det.plan == ("bytes", "utf-8") and fixed == det.text:
+        # 已是合法 UTF-8（含 BOM 的也原樣保留）且沒有翻譯變動：輸出與原檔位元組相同
+        return _copy_result(src, out, det.tag)
     try:
         out.write_text(fixed, encoding="utf-8", errors="ignore")
-        return True, tag, out
+        return True, det.tag, out
+    except Exception as e:
+        return False, f"寫入失敗：{e}", out
+
+def _utf8_valid(mm) -> bool:
+    """逐塊嚴格解碼整份檔案（只驗證、不保留結果），確認串流修復不會替換任何位元組"""
+    dec = codecs.getincrementaldecoder("utf-8")()
+    try:
+        for pos in range(0, len(mm), STREAM_BLOCK_BYTES):
+            dec.decode(mm[pos:pos + STREAM_BLOCK_BYTES], pos + STREAM_BLOCK_BYTES >= len(mm))
+    except UnicodeDecodeError:
+        return False
+    return True
+
+def _plan_encoding(plan: Tuple[str, ...]) -> str:
+    """檔案原始位元組實際所屬的編碼：bytes/fallback 為 plan[1]；mojibake 為逆轉後的 right"""
+    enc = plan[3] if plan[0] == "mojibake" else plan[1]
+    try:
+        return codecs.lookup(enc).name if enc else "latin-1"
+    except LookupError:
+        return "latin-1"
+
+def _safe_cut(buf, pos: int, enc: str) -> Optional[int]:
+    limit = min(len(buf), pos + PARALLEL_SEARCH_BYTES)
+    if enc.startswith("utf-16"):
+        # 只在偶數位置切：優先找換行碼元，否則找前一個碼元不是高位代理的位置
+        be = enc.endswith("be")
+        newline = b"\x00\n" if be else b"\n\x00"
+        i = buf.find(newline, pos, limit)
+        while i != -1 and i % 2:
+            i = buf.find(newline, i + 1, limit)
+        if i != -1:
+            return i + 2
+        for p in range(pos + (pos & 1), limit, 2):
+            high = buf[p - 2] if be else buf[p - 1]
+            if not 0xD8 <= high <= 0xDB:
+                return p
+        return None
+    i = buf.find(b"\n", pos, limit)
+    if i != -1:
+        return i + 1
+    if enc == "utf-8":
+        m = _UTF8_LEAD_RE.search(buf, max(pos, 1), limit)
+        return m.start() if m else None
+    m = _SAFE_CUT_RE.search(buf, pos, limit)
+    return m.end() if m else None
+
+def chunk_boundaries(buf, plan: Tuple[str, ...], chunk: Optional[int] = None) -> List[int]:
+    """依 plan 的編碼把 buf 切成約 chunk 位元組的段落（預設 PARALLEL_CHUNK_BYTES，呼叫時才讀取），
+    回傳切點（含 0 與結尾）；每段都能獨立解碼"""
+    chunk = chunk or PARALLEL_CHUNK_BYTES
+    enc = _plan_encoding(plan)
+    size = len(buf)
+    cuts = [0]
+    pos = chunk
+    while pos < size:
+        cut = _safe_cut(buf, pos, enc)
+        if cut is None:
+            pos += PARALLEL_SEARCH_BYTES   # 這附近沒有安全切點，延長目前這段
+            continue
+        if cut >= size:
+            break
+        cuts.append(cut)
+        pos = cut + chunk
+    cuts.append(size)
+    return cuts
+
+def decode_workers() -> int:
+    """單檔平行解碼可用的行程數；已在批次的子行程內時回 1（不再巢狀開行程池）"""
+    import multiprocessing
+    if multiprocessing.parent_process() is not None:
+        return 1
+    return max(1, DECODE_WORKERS or os.cpu_count() or 1)
+
+def _decode_mixed(b: bytes, plan: Tuple[str, ...], mode: str) -> Tuple[str, Optional[str]]:
+    """混合編碼的段落：逐行沿用原計畫，連續解不開的行合成一組自行偵測；回傳 (文字, 改用最多的 tag)"""
+    if _plan_encoding(plan).startswith("utf-16"):
+        det = decode_bytes_detail(b, mode)   # UTF-16 不能按位元組找換行，整段重新偵測
+        return det.text, (det.tag if det.plan != plan else None)
+    out: List[str] = []
+    bad: List[bytes] = []
+    used: Dict[str, int] = {}
+    def flush():
+        if bad:
+            run = b"".join(bad)
+            det = decode_bytes_detail(run, mode)
+            out.append(det.text)
+            if det.plan != plan:
+                used[det.tag] = used.get(det.tag, 0) + len(run)
+            bad.clear()
+    for line in b.splitlines(keepends=True):
+        try:
+            text = _apply_plan(line, plan)
+        except UnicodeDecodeError:
+            bad.append(line)
+            continue
+        flush()
+        out.append(text)
+    flush()
+    return "".join(out), (max(used, key=used.get) if used else None)
+
+def _decode_chunk_worker(path: str, offset: int, length: int, plan: Tuple[str, ...], mode: str,
+                         part: str) -> Optional[str]:
+    """子行程：解碼一段並以 UTF-8 寫入 part。整份的計畫解不開這段時（混合編碼）改由這段自行偵測，回傳改用的 tag"""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        b = f.read(length)
+    tag = None
+    try:
+        text = _apply_plan(b, plan)
+    except UnicodeDecodeError:
+        # 零星壞位元組和串流一樣以替代字元保留位置；解不開的比例高才視為混合編碼，這段自行偵測
+        text = b.decode(plan[1], errors="replace")
+        if text.count("\ufffd") * PARALLEL_MIXED_RATIO > len(b):
+            text, tag = _decode_mixed(b, plan, mode)
+    with open(part, "wb") as w:
+        w.write(text.encode("utf-8", errors="ignore"))
+    return tag
+
+def repair_text_parallel(src: Path, buf, out: Path, mode: str, det: DecodeResult,
+                         workers: int) -> Tuple[bool, str, Path]:
+    """超大文字檔（不翻譯）的單檔平行修復：在編碼安全的位置切段，各段交給行程池解碼/逆轉，
+    寫成暫存分段後依序接回。整份沿用開頭樣本選出的計畫，只有解不開的段落才各自偵測"""
+    global PROGRESS_HOOK
+    cuts = chunk_boundaries(buf, det.plan)
+    spans = list(zip(cuts, cuts[1:]))
+    total = len(spans)
+    try:
+        parts_dir = Path(tempfile.mkdtemp(prefix=f".{out.name}.", dir=out.parent))
     except Exception as e:
         return False, f"寫入失敗：{e}", out
+    parts = [parts_dir / f"{k:05d}" for k in range(total)]
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    pool = ProcessPoolExecutor(max_workers=min(workers, total))
+    try:
+        with trace_span("parallel", bytes=len(buf), chunks=total, workers=min(workers, total)):
+            if PROGRESS_HOOK: PROGRESS_HOOK("begin", total=total, label="解碼檢測")
+            futs = [pool.submit(_decode_chunk_worker, str(src), lo, hi - lo, det.plan, mode, str(part))
+                    for (lo, hi), part in zip(spans, parts)]
+            for i, _ in enumerate(as_completed(futs), 1):
+                if PROGRESS_HOOK: PROGRESS_HOOK("tick", i=i, total=total)
+            switched = [fut.result() for fut in futs]
+            with open(out, "wb") as w:
+                for part in parts:
+                    with open(part, "rb") as r:
+                        shutil.copyfileobj(r, w, STREAM_BLOCK_BYTES)
+    except Exception as e:
+        return False, f"寫入失敗：{e}", out
+    finally:
+        # 先收掉行程池與暫存分段：end 事件會走 checkpoint，取消時在這裡拋出 RepairCancelled
+        pool.shutdown(wait=True, cancel_futures=True)
+        shutil.rmtree(parts_dir, ignore_errors=True)
+        if PROGRESS_HOOK: PROGRESS_HOOK("end")
+    tag = f"{det.tag}, 平行 {total} 段"
+    mixed: Dict[str, int] = {}
+    for t in switched:
+        if t:
+            mixed[t] = mixed.get(t, 0) + 1
+    if mixed:
+        tag += "，混合編碼：" + "、".join(f"{t}×{n}" for t, n in mixed.items())
+    return True, tag, out
+
+_SOFT_BREAKS = "。！？；，.!?;, \t"
+
+def _forced_cut(text: str, start: int) -> int:
+    """沒有換行的超長單行（壓縮過的 JSON、單行匯出檔等）：未完成的行累積到一個區塊就強制切段，
+    優先切在後半段最後一個句讀或空白之後，否則整段送出；翻譯暫存因此不會隨檔案大小成長"""
+    soft = max(text.rfind(ch, start) for ch in _SOFT_BREAKS) + 1
+    return soft if soft > start + (len(text) - start) // 2 else len(text)
 
-def repair_xlsx_to_new_file(src: Path, mode: str, target: str) -> Tuple[bool, str, Path]:
-    out = build_fixed_name(src, mode)
+def repair_text_streaming(src: Path, out: Path, mode: str, target: str) -> Tuple[bool, str, Path]:
+    """大檔：mmap 讀取、開頭樣本判斷編碼、逐塊增量解碼並以 UTF-8 增量寫出，記憶體用量與檔案大小無關"""
+    global PROGRESS_HOOK
+    try:
+        f = open(src, "rb")
+    except Exception as e:
+        return False, f"無法讀取：{e}", out
+    with f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception as e:
+            return False, f"無法讀取：{e}", out
+        with mm:
+            size = len(mm)
+            with muted_progress():
+                det = decode_bytes_detail(mm[:STREAM_SAMPLE_BYTES], mode, final=size <= STREAM_SAMPLE_BYTES)
+            if det.plan == ("bytes", "utf-8") and target == "none" and _utf8_valid(mm):
+                return _copy_result(src, out, f"{det.tag}, 串流")
+            if target == "none":
+                workers = decode_workers()
+                if workers > 1 and size > PARALLEL_CHUNK_BYTES:
+                    return repair_text_parallel(src, mm, out, mode, det, workers)
+            decode = plan_decoder(det.plan)
+            encoder = codecs.getincrementalencoder("utf-8")(errors="ignore")
+            total = max(1, -(-size // STREAM_BLOCK_BYTES))
+            if PROGRESS_HOOK: PROGRESS_HOOK("begin", total=total, label="解碼檢測")
+            try:
+                with open(out, "wb") as w:
+                    pending = ""   # 翻譯時保留未完整的最後一行，避免在行中間切段
+                    for i, pos in enumerate(range(0, size, STREAM_BLOCK_BYTES), 1):
+                        last = pos + STREAM_BLOCK_BYTES >= size
+                        text = decode(mm[pos:pos + STREAM_BLOCK_BYTES], last)
+                        if target != "none":
+                            text = pending + text
+                            cut = len(text) if last else text.rfind("\n") + 1
+                            if len(text) - cut >= STREAM_BLOCK_BYTES:
+                                cut = _forced_cut(text, cut)
+                            pending = text[cut:]
+                            with muted_progress():
+                                text = translate_text(text[:cut], target, mode)
+                        w.write(encoder.encode(text))
+                        if PROGRESS_HOOK: PROGRESS_HOOK("tick", i=i, total=total)
+                    w.write(encoder.encode("", True))
+            except Exception as e:
+                return False, f"寫入失敗：{e}", out
+            finally:
+                if PROGRESS_HOOK: PROGRESS_HOOK("end")
+    return True, f"{det.tag}, 串流", out
+
+def configure_xlsx_streaming(enabled: bool):
+    """大型活頁簿是否改走串流（會失去版面）；寫回環境變數，讓批次的子行程沿用"""
+    global XLSX_STREAMING
+    XLSX_STREAMING = bool(enabled)
+    os.environ[XLSX_STREAMING_ENV] = "1" if enabled else "0"
+
+def repair_xlsx_to_new_file(src: Path, mode: str, target: str,
+                            out: Optional[Path] = None) -> Tuple[bool, str, Path]:
+    out = out or build_fixed_name(src, mode)
+    openpyxl = get_openpyxl()
     if openpyxl is None:
         return False, "未安裝 openpyxl", out
+    if target == "none" and xlsx_unchanged(src, mode):
+        return _copy_result(src, out, "COPY")
     try:
+        if XLSX_STREAMING and src.stat().st_size >= XLSX_STREAM_THRESHOLD_BYTES:
+            return repair_xlsx_streaming(src, out, mode, target)
         wb = openpyxl.load_workbook(src)
     except Exception as e:
         return False, f"無法開啟：{e}", out
     changed = False
+    # 先收集整份活頁簿的字串儲存格，一次批次翻譯後再寫回
+    cells = []
     for ws in wb.worksheets:
         for row in ws.iter_rows(values_only=False):
             for cell in row:
                 v = cell.value
                 if isinstance(v, str) and v:
-                    nv = transform_string(v, mode)
-                    nv = translate_text(nv, target)
-                    if nv != v:
-                        cell.value = nv
-                        changed = True
+                    cells.append(cell)
+    fixed = translate_many(transform_many([c.value for c in cells], mode), target, mode=mode)
+    for cell, nv in zip(cells, fixed):
+        if nv != cell.value:
+            cell.value = nv
+            changed = True
+    if not changed:
+        return _copy_result(src, out, "COPY")
     try:
-        wb.save(out)
+        with trace_span("save", fmt="xlsx"):
+            wb.save(out)
         return True, ("FIXED" if changed else "COPY"), out
     except Exception as e:
         return False, f"輸出失敗：{e}", out
 
-def repair_docx_to_new_file(src: Path, mode: str, target: str) -> Tuple[bool, str, Path]:
-    out = build_fixed_name(src, mode)
+def repair_xlsx_streaming(src: Path, out: Path, mode: str, target: str) -> Tuple[bool, str, Path]:
+    """大型活頁簿：read-only 逐列讀取、write-only 逐列寫出，不建立整份儲存格物件。
+    相同字串（共用字串表）只修復/翻譯一次；需要翻譯時先掃一遍收集字串、批次翻譯，再掃第二遍寫出。
+    代價是輸出不保留儲存格樣式、欄寬、合併儲存格與超連結，因此只在 configure_xlsx_streaming(True) 後使用，
+    tag 也會註明；內容沒有變動時直接複製原檔"""
+    global PROGRESS_HOOK
+    openpyxl = get_openpyxl()
+    if openpyxl is None:
+        return False, "未安裝 openpyxl", out
+    try:
+        wb = openpyxl.load_workbook(src, read_only=True)
+    except Exception as e:
+        return False, f"無法開啟：{e}", out
+    memo: Dict[str, str] = {}
+    changed = False
+    try:
+        total = max(1, sum(ws.max_row or 0 for ws in wb.worksheets))
+        done = 0
+        if PROGRESS_HOOK: PROGRESS_HOOK("begin", total=total, label="解碼檢測")
+        if target != "none":
+            for ws in wb.worksheets:
+                for row in ws.iter_rows(values_only=True):
+                    for v in row:
+                        if isinstance(v, str) and v and v not in memo:
+                            memo[v] = transform_string(v, mode)
+                    done += 1
+                    if PROGRESS_HOOK:
+                        PROGRESS_HOOK("tick", i=min(done, total), total=total)
+            if PROGRESS_HOOK:
+                PROGRESS_HOOK("tick", i=total, total=total)
+                PROGRESS_HOOK("end")
+            memo = dict(zip(memo, translate_many(list(memo.values()), target, mode=mode)))
+        out_wb = openpyxl.Workbook(write_only=True)
+        for ws in wb.worksheets:
+            ws_out = out_wb.create_sheet(title=ws.title)
+            for row in ws.iter_rows(values_only=True):
+                values = list(row)
+                for k, v in enumerate(values):
+                    if isinstance(v, str) and v:
+                        nv = memo.get(v)
+                        if nv is None:
+                            nv = memo[v] = transform_string(v, mode)
+                        if nv != v:
+                            values[k] = nv
+                            changed = True
+                ws_out.append(values)
+                if target == "none":
+                    done += 1
+                    if PROGRESS_HOOK:
+                        PROGRESS_HOOK("tick", i=min(done, total), total=total)
+        if PROGRESS_HOOK and target == "none":
+            PROGRESS_HOOK("tick", i=total, total=total)
+            PROGRESS_HOOK("end")
+        if not changed:
+            # 收尾並刪掉 write-only 工作表的暫存檔（不存檔直接丟棄，GC 時會噴 lxml 錯誤）
+            for ws_out in out_wb.worksheets:
+                try:
+                    ws_out.close()
+                    ws_out._writer.cleanup()
+                except Exception:
+                    pass
+            return _copy_result(src, out, "COPY")
+        with trace_span("save", fmt="xlsx"):
+            out_wb.save(out)
+        return True, f"FIXED, {XLSX_STREAM_TAG}", out
+    except Exception as e:
+        return False, f"輸出失敗：{e}", out
+    finally:
+        wb.close()
+
+def repair_docx_to_new_file(src: Path, mode: str, target: str,
+                            out: Optional[Path] = None) -> Tuple[bool, str, Path]:
+    out = out or build_fixed_name(src, mode)
+    docx = get_docx()
     if docx is None:
         return False, "未安裝 python-docx", out
     try:
@@ -305,264 +2094,1218 @@ def repair_docx_to_new_file(src: Path, mode: str, target: str) -> Tuple[bool, st
     except Exception as e:
         return False, f"無法開啟：{e}", out
     changed = False
-    def fix_run(run):
-        nonlocal changed
-        if run.text:
-            nv = transform_string(run.text, mode)
-            nv = translate_text(nv, target)
-            if nv != run.text:
-                run.text = nv
-                changed = True
-    for para in document.paragraphs:
-        for run in para.runs:
-            fix_run(run)
+    runs = [run for para in document.paragraphs for run in para.runs if run.text]
     for table in document.tables:
         for row in table.rows:
             for cell in row.cells:
                 for para in cell.paragraphs:
-                    for run in para.runs:
-                        fix_run(run)
+                    runs.extend(run for run in para.runs if run.text)
+    # 整份文件的 run 一次批次翻譯，避免每個 run 各自往返一次
+    texts = [run.text for run in runs]
+    fixed = translate_many(transform_many(texts, mode), target, mode=mode)
+    for run, t, nv in zip(runs, texts, fixed):
+        if nv != t:
+            run.text = nv
+            changed = True
+    if not changed:
+        return _copy_result(src, out, "COPY")
     try:
-        document.save(str(out))
+        with trace_span("save", fmt="docx"):
+            document.save(str(out))
         return True, ("FIXED" if changed else "COPY"), out
     except Exception as e:
         return False, f"輸出失敗：{e}", out
 
-def process_one(path: Path, mode: str, target: str) -> str:
-    ext = path.suffix.lower()
-    if ext in TEXT_EXTS:
-        ok, info, out = repair_text_to_new_file(path, mode, target)
-        return f"[OK] TEXT→{out} ({info}, tgt={target})" if ok else f"[ERROR] TEXT：{path} ({info})"
-    if ext in XLSX_EXTS:
-        ok, info, out = repair_xlsx_to_new_file(path, mode, target)
-        return f"[OK] XLSX→{out} ({info}, tgt={target})" if ok else f"[ERROR] XLSX：{path} ({info})"
-    if ext in DOCX_EXTS:
-        ok, info, out = repair_docx_to_new_file(path, mode, target)
-        return f"[OK] DOCX→{out} ({info}, tgt={target})" if ok else f"[ERROR] DOCX：{path} ({info})"
-    out = build_fixed_name(path, mode)
+def process_one_record(path: Path, mode: str, target: str, out: Optional[Path] = None) -> Dict[str, Any]:
+    """同 process_one，但回傳結構化紀錄（命令列 JSONL 報告用）：
+    path/kind/status(ok|copy|error)/tag/bytes/duration/output/message"""
+    t0 = time.perf_counter()
     try:
-        shutil.copy2(path, out)
-        return f"[COPY] 不支援副檔名，複製為：{out}"
-    except Exception as e:
-        return f"[ERROR] 不支援副檔名且複製失敗：{path} -> {e}"
+        size = path.stat().st_size
+    except OSError:
+        size = None
+    rec = {"path": str(path), "kind": "COPY", "status": "error", "tag": "", "bytes": size,
+           "duration": 0.0, "output": None, "mode": mode, "target": target}
+    counters = _cache_counters() if TRACE_SINK is not None else None
+    with trace_span("file", path=str(path), bytes=size) as sp:
+        ext = path.suffix.lower()
+        repair = None
+        if ext in TEXT_EXTS:
+            rec["kind"], repair = "TEXT", repair_text_to_new_file
+        elif ext in XLSX_EXTS:
+            rec["kind"], repair = "XLSX", repair_xlsx_to_new_file
+        elif ext in DOCX_EXTS:
+            rec["kind"], repair = "DOCX", repair_docx_to_new_file
+        if repair is not None:
+            ok, info, out = repair(path, mode, target, out)
+            kind = rec["kind"]
+            if ok:
+                rec.update(status="ok", tag=info, output=str(out),
+                           message=f"[OK] {kind}→{out} ({info}, tgt={target})")
+            else:
+                rec.update(error=info, message=f"[ERROR] {kind}：{path} ({info})")
+        else:
+            out = out or build_fixed_name(path, mode)
+            try:
+                fast_copy(path, out)
+                rec.update(status="copy", tag="COPY", output=str(out),
+                           message=f"[COPY] 不支援副檔名，複製為：{out}")
+            except Exception as e:
+                rec.update(error=str(e), message=f"[ERROR] 不支援副檔名且複製失敗：{path} -> {e}")
+        sp.set(fmt=rec["kind"], status=rec["status"], tag=rec["tag"])
+    if counters is not None:
+        trace_cache_deltas(counters)
+    rec["duration"] = round(time.perf_counter() - t0, 6)
+    return rec
 
-# ---------- GUI ----------
-class App(tk.Tk):
+def process_one(path: Path, mode: str, target: str, out: Optional[Path] = None) -> str:
+    """out：預先分配好的輸出路徑（批次處理用）；None 則自行依檔名產生"""
+    return process_one_record(path, mode, target, out)["message"]
+
+# ---------- 批次處理（多核心） ----------
+class RepairCancelled(BaseException):
+    """使用者取消。繼承 BaseException：修復流程中大量的 except Exception 不會把它吞掉"""
+
+class BatchControl:
+    """呼叫端（GUI）與批次工作之間的暫停/取消旗標，可跨執行緒使用"""
     def __init__(self):
-        super().__init__()
-        self.title("文本亂碼修復工具（v4.1_20250819）")
-        self.geometry("760x420")
-        self.minsize(560, 300)
-        self.resizable(True, True)
-        # 置中容器：把上方的兩個下拉與按鈕都裝進來
-        controls = tk.Frame(self)
-        controls.grid(row=0, column=0, columnspan=2, pady=(12, 6), sticky="n")  # 不拉伸，居中
-        controls.grid_columnconfigure(0, weight=0)
-        controls.grid_columnconfigure(1, weight=0)
-        self._prog_started = False  # 單檔只啟動一次進度列
-        self._prog_tag_name = "PROG_LINE"   # Text tag 名稱（用 tag 取代 mark）
-        # 進度配重（預設只有解碼，保留 1% 給收尾寫檔）
-        self._phase_weights = {"解碼檢測": 99, "中文轉換": 0, "翻譯載入": 0}
-
-        # 來源語言
-        self.src_lang_var = tk.StringVar(value="自動")
-        tk.Label(controls, text="來源語言：").grid(row=0, column=0, sticky="e", padx=(0, 6))
-        ttk.Combobox(controls, textvariable=self.src_lang_var,
-                     values=["自動", "簡體中文", "繁體中文", "日文", "英文"],
-                     state="readonly", width=28).grid(row=0, column=1, sticky="w")
-
-        # 目標語言
-        self.tgt_lang_var = tk.StringVar(value="不翻譯")
-        tk.Label(controls, text="目標語言：").grid(row=1, column=0, sticky="e", padx=(0, 6))
-        ttk.Combobox(controls, textvariable=self.tgt_lang_var,
-                     values=["不翻譯", "簡體中文", "繁體中文", "英文", "日文"],
-                     state="readonly", width=28).grid(row=1, column=1, sticky="w")
-
-        # 按鈕
-        tk.Button(controls, text="選擇文件並處理", command=self.process_files, width=24) \
-            .grid(row=2, column=0, columnspan=2, pady=12)
-
-        # 結果
-        self.result = tk.Text(self, height=10)
-        self.result.grid(row=1, column=0, columnspan=2, padx=10, pady=10, sticky="nsew")
-        self.result.configure(font=("Arial", 10))
-
-        self.grid_rowconfigure(1, weight=1)
-        self.grid_columnconfigure(1, weight=1)
-        self.grid_columnconfigure(1, weight=1)
-
-        # 樣式
-        self.result.tag_configure("HDR", font=("Arial", 10, "bold"))
-        self.result.tag_configure("OK", foreground="#0a7f00")
-        self.result.tag_configure("COPY", foreground="#000000")
-        self.result.tag_configure("ERROR", foreground="#b00020")
-        self.result.tag_configure("MUTED", foreground="#666666")
-
-        # 置前
-        self.lift()
-        self.attributes("-topmost", True)
-        self.after(200, lambda: self.attributes("-topmost", False))
-
-        # 依賴狀態
-        status = []
-        status.append("OpenCC: OK" if OpenCC else "OpenCC: 未安裝")
-        status.append("GoogleTranslator: OK" if GoogleTranslator else "GoogleTranslator: 未安裝/不可用")
-        tk.Label(self, text=" / ".join(status), fg="#666").grid(row=2, column=0, columnspan=2, pady=(0,8))
-
-    # ====== 文字條進度：用 Text mark 精準覆寫 ======
-    def _ascii_bar(self, pct: int, side: int = 16) -> str:
-        pct = max(0, min(100, int(pct)))
-        filled = max(1, int(round(pct * side / 100)))
-        left  = "|" * filled + " " * (side - filled)
-        right = " " * (side - filled) + "|" * filled
-        return f"{left}{pct:>3d}%{right}"
-
-    def begin_progress(self, label: str = "處理中…"):
-        # 先把舊的進度區間 tag 移除（不存在也沒關係）
+        self._cancel = threading.Event()
+        self._running = threading.Event()
+        self._running.set()
+
+    def cancel(self):
+        self._cancel.set()
+        self._running.set()   # 暫停中也要能立刻結束
+
+    def pause(self):
+        self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    @property
+    def paused(self) -> bool:
+        return not self._running.is_set()
+
+    def wait_running(self, timeout: Optional[float] = None) -> bool:
+        return self._running.wait(timeout)
+
+    def checkpoint(self):
+        """暫停時在此等待；已取消則拋出 RepairCancelled"""
+        self._running.wait()
+        if self._cancel.is_set():
+            raise RepairCancelled()
+
+def _error_record(path: Path, mode: str, target: str, message: str, error: str) -> Dict[str, Any]:
+    return {"path": str(path), "kind": "", "status": "error", "tag": "", "bytes": None,
+            "duration": 0.0, "output": None, "mode": mode, "target": target,
+            "error": error, "message": message}
+
+_POOL_CANCEL = None   # run_batch 行程池共用的取消旗標（multiprocessing.Event），由 _pool_init 在子行程設定
+
+def _pool_checkpoint():
+    if _POOL_CANCEL is not None and _POOL_CANCEL.is_set():
+        raise RepairCancelled()
+
+def _pool_init(cancel_event):
+    """run_batch 行程池的 initializer：子行程在每次進度回拋時檢查取消旗標，已開始的檔案也能中途停下"""
+    global _POOL_CANCEL
+    _POOL_CANCEL = cancel_event
+    set_progress_hook(lambda stage, **kw: None, _pool_checkpoint)
+
+def _batch_worker(path: str, mode: str, target: str, out: str, trace: bool = False) -> Dict[str, Any]:
+    # 子行程入口：只傳字串，避免 pickle 額外物件。trace=True 時把本檔的追蹤事件放在 "trace" 帶回主行程
+    if trace and not isinstance(TRACE_SINK, TraceRecorder):
+        set_trace_sink(TraceRecorder())
+    if _POOL_CANCEL is not None and _POOL_CANCEL.is_set():
+        # 取消前已送進行程池佇列的檔案：不開始處理
+        return _cancelled_record(Path(path), mode, target)
+    try:
+        rec = process_one_record(Path(path), mode, target, Path(out))
+    except RepairCancelled:
+        # 中途取消：移除寫到一半的輸出
+        with contextlib.suppress(OSError):
+            Path(out).unlink()
+        rec = _cancelled_record(Path(path), mode, target)
+    except Exception as e:
+        rec = _error_record(Path(path), mode, target, f"[ERROR] 例外：{path} -> {e}", str(e))
+    if trace:
+        rec["trace"] = TRACE_SINK.drain()
+    return rec
+
+def _cancelled_record(path: Path, mode: str, target: str) -> Dict[str, Any]:
+    return _error_record(path, mode, target, f"[ERROR] 已取消：{path}", "cancelled")
+
+# ---------- 增量處理（內容雜湊 manifest） ----------
+MANIFEST_NAME = ".textfix-manifest"         # 每個資料夾一份（JSON）
+MANIFEST_VERSION = 1
+HASH_BLOCK_BYTES = 1024 * 1024
+
+def file_digest(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_BYTES), b""):
+            h.update(block)
+    return h.hexdigest()
+
+class FolderManifest:
+    """單一資料夾的處理紀錄：來源檔名 -> size/mtime_ns/sha256/mode/target/kind/tag/output（輸出檔名）"""
+    def __init__(self, folder: Path):
+        self.path = folder / MANIFEST_NAME
+        self.dirty = False
         try:
-            self.result.tag_delete(self._prog_tag_name)
-        except tk.TclError:
-            pass
-        self._prog_label = label
-        self._prog_started = True
-        self._prog_line_created = False
-
-    def update_progress(self, pct: int):
-        tag = self._prog_tag_name
-
-        # 第一次 tick：先插標題行，再插「被 tag 標記」的進度條本體 + 換行
-        if not getattr(self, "_prog_line_created", False):
-            self.result.insert(tk.END, f"{getattr(self, '_prog_label', '處理中…')}\n", "MUTED")
-            self.result.insert(tk.END, self._ascii_bar(pct), (tag, "MUTED"))  # 只給進度條本體加 tag
-            self.result.insert(tk.END, "\n")  # 換行獨立，避免被覆蓋
-            self._prog_line_created = True
-            self.result.see(tk.END)
-            self.update_idletasks()
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            self.entries: Dict[str, Dict[str, Any]] = \
+                dict(data["files"]) if data.get("version") == MANIFEST_VERSION else {}
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            self.entries = {}
+
+    def save(self):
+        if not self.dirty:
             return
+        # 先寫暫存檔再換名：中途中斷不會留下半份 manifest
+        tmp = self.path.with_name(f"{MANIFEST_NAME}.{os.getpid()}.tmp")
+        try:
+            tmp.write_text(json.dumps({"version": MANIFEST_VERSION, "files": self.entries},
+                                      ensure_ascii=False, indent=0), encoding="utf-8")
+            os.replace(tmp, self.path)
+            self.dirty = False
+        except OSError as e:
+            with contextlib.suppress(OSError):
+                tmp.unlink()
+            print(f"[WARN] 無法寫入 {self.path}：{e}", file=sys.stderr)
 
-        # 後續 tick：精準覆寫「tag 範圍」內容（單行、不新增）
-        ranges = self.result.tag_ranges(tag)
-        if ranges:
-            start, end = ranges[0], ranges[1]
-            self.result.delete(start, end)
-            self.result.insert(start, self._ascii_bar(pct), (tag, "MUTED"))
-            self.result.see(tk.END)
-            self.update_idletasks()
-
-    def end_progress(self, msg: str = "完成"):
-        self.update_progress(100)
-        self.result.insert(tk.END, f"  {msg}\n", "MUTED")
-        # 立刻把 100% + 完成 推到 UI
-        self.result.see(tk.END)
-        self.update_idletasks()
-
-        self._prog_started = False
-        self._prog_line_created = False
-
-    def process_files(self):
-        mode = ui_src_mode(self.src_lang_var.get())
-        target = ui_target_code(self.tgt_lang_var.get())
-
-        files = filedialog.askopenfilenames(
-            title="選擇需要修復的文件",
-            filetypes=[("All Supported", "*.txt *.csv *.tsv *.srt *.ass *.md *.json *.yaml *.yml *.log *.ini *.cfg *.html *.htm *.xml *.xlsx *.docx"),
-                       ("Text", "*.txt *.csv *.tsv *.srt *.ass *.md *.json *.yaml *.yml *.log *.ini *.cfg *.html *.htm *.xml"),
-                       ("Excel", "*.xlsx"),
-                       ("Word", "*.docx"),
-                       ("All files", "*.*")]
-        )
-        if not files:
+class IncrementalState:
+    """run_batch(incremental=True) 的主行程狀態：判斷檔案是否未變更、記下雜湊，完成後寫回各資料夾的 manifest。
+    size 與 mtime 都和紀錄相同時沿用紀錄中的雜湊，不重讀檔案"""
+    def __init__(self, mode: str, target: str, index: FixedNameIndex):
+        self.mode, self.target, self.index = mode, target, index
+        self.manifests: Dict[Path, FolderManifest] = {}
+        self.info: Dict[int, Tuple[int, int, str]] = {}   # 批次序號 -> (size, mtime_ns, sha256)
+
+    def manifest(self, folder: Path) -> FolderManifest:
+        m = self.manifests.get(folder)
+        if m is None:
+            m = self.manifests[folder] = FolderManifest(folder)
+        return m
+
+    def check(self, k: int, path: Path) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """回傳 (紀錄, 雜湊)：紀錄只在內容、模式、目標都相同且輸出檔仍在時才回傳（可略過）。
+        讀不到檔案時雜湊為 None，交給正常流程回報錯誤"""
+        try:
+            st = path.stat()
+            entry = self.manifest(path.parent).entries.get(path.name)
+            if entry and entry.get("size") == st.st_size and entry.get("mtime_ns") == st.st_mtime_ns:
+                digest = entry["sha256"]
+            else:
+                digest = file_digest(path)
+        except (OSError, KeyError):
+            return None, None
+        self.info[k] = (st.st_size, st.st_mtime_ns, digest)
+        if entry and entry.get("sha256") == digest and entry.get("mode") == self.mode \
+                and entry.get("target") == self.target and entry.get("output") \
+                and self.index.exists(path.parent / entry["output"]):
+            return entry, digest
+        return None, digest
+
+    def previous_output(self, path: Path) -> Optional[Path]:
+        """上次以相同模式、目標為此檔產生、仍存在的輸出：內容變了就覆寫它，不再另開 _fixed_N。
+        模式或目標不同時回 None，另配新檔名，不蓋掉先前的結果（例如翻譯版）"""
+        entry = self.manifest(path.parent).entries.get(path.name)
+        if not entry or entry.get("mode") != self.mode or entry.get("target") != self.target:
+            return None
+        out = entry.get("output")
+        if out and self.index.exists(path.parent / out):
+            return path.parent / out
+        return None
+
+    def record(self, k: int, path: Path, rec: Dict[str, Any]):
+        if k not in self.info or rec["status"] not in ("ok", "copy", "skip") or not rec.get("output"):
+            return
+        size, mtime_ns, digest = self.info[k]
+        entry = {"size": size, "mtime_ns": mtime_ns, "sha256": digest, "mode": self.mode,
+                 "target": self.target, "kind": rec["kind"], "tag": rec["tag"], "output": Path(rec["output"]).name}
+        m = self.manifest(path.parent)
+        if m.entries.get(path.name) != entry:
+            m.entries[path.name] = entry
+            m.dirty = True
+
+    def save(self):
+        for m in self.manifests.values():
+            m.save()
+
+def _skip_record(path: Path, mode: str, target: str, entry: Dict[str, Any], digest: str) -> Dict[str, Any]:
+    out = path.parent / entry["output"]
+    return {"path": str(path), "kind": entry.get("kind", ""), "status": "skip", "tag": entry.get("tag", ""),
+            "bytes": None, "duration": 0.0, "output": str(out), "mode": mode, "target": target,
+            "sha256": digest, "message": f"[SKIP] 未變更：{path} -> {out}"}
+
+def _duplicate_record(path: Path, out: Path, src: Path, rec: Dict[str, Any]) -> Dict[str, Any]:
+    """內容與 src 相同：直接複製 src 的輸出，不再重跑一次修復"""
+    dup = dict(rec, path=str(path), duration=0.0, duplicate_of=str(src))
+    if rec["status"] == "skip":
+        dup["status"] = "copy" if rec["kind"] == "COPY" else "ok"
+    if dup["status"] not in ("ok", "copy"):
+        dup.update(output=None, message=f"[ERROR] 內容與 {src} 相同，該檔處理失敗：{rec.get('error', '')}")
+        return dup
+    t0 = time.perf_counter()
+    try:
+        fast_copy(Path(rec["output"]), out)
+    except Exception as e:
+        dup.update(status="error", output=None, error=str(e), message=f"[ERROR] 複製相同內容的輸出失敗：{path} -> {e}")
+        return dup
+    prefix = "[OK]" if dup["status"] == "ok" else "[COPY]"
+    dup.update(output=str(out), duration=round(time.perf_counter() - t0, 6),
+               message=f"{prefix} {rec['kind']}→{out}（內容與 {src} 相同，沿用其結果）")
+    return dup
+
+def run_batch(paths: List[Path], mode: str, target: str, workers: Optional[int] = None,
+              events: Optional["queue.Queue"] = None,
+              control: Optional[BatchControl] = None, incremental: bool = False) -> List[Dict[str, Any]]:
+    """多檔平行處理，依輸入順序回傳 process_one_record 的紀錄（訊息在 "message"）。
+    events 依序收到 ("begin", total)、每完成一檔 ("file", idx, path, record, done)、最後 ("end", total)；
+    workers == 1 時在目前行程依序處理，另外送出 ("start", idx, path) 與
+    ("progress", idx, stage, i, total, label)（即 PROGRESS_HOOK 的內容）。
+    control：暫停時不再派送新檔案，取消時尚未開始的檔案標為已取消，進行中的檔案在下一個進度檢查點停下並移除輸出。
+    incremental：依各資料夾的 manifest 略過內容、模式、目標都沒變的檔案（status "skip"），
+    同批內容相同的檔案只修復一次、其餘複製輸出；manifest 只在主行程讀寫"""
+    global PROGRESS_HOOK
+    # 輸出名稱一律在主行程先分配好：各子行程同時寫入同一資料夾時才不會撞名
+    index = FixedNameIndex()
+    state = IncrementalState(mode, target, index) if incremental else None
+    results: List[Optional[Dict[str, Any]]] = [None] * len(paths)
+    outs: List[Optional[Path]] = [None] * len(paths)
+    skipped: Dict[int, Dict[str, Any]] = {}
+    followers: Dict[int, List[int]] = {}   # 第一個出現的檔案 -> 內容相同的其他檔案
+    first_of: Dict[Tuple[str, str], int] = {}
+    todo_idx: List[int] = []
+    for k, p in enumerate(paths):
+        if state is not None:
+            entry, digest = state.check(k, p)
+            key = (digest, p.suffix.lower())
+            if entry is not None:
+                skipped[k] = _skip_record(p, mode, target, entry, digest)
+                first_of.setdefault(key, k)
+                continue
+            if digest is not None:
+                if key in first_of:
+                    followers.setdefault(first_of[key], []).append(k)
+                    outs[k] = state.previous_output(p) or index.allocate(p, mode)
+                    continue
+                first_of[key] = k
+            outs[k] = state.previous_output(p)
+        outs[k] = outs[k] or index.allocate(p, mode)
+        todo_idx.append(k)
+    workers = max(1, min(workers or BATCH_WORKERS, len(todo_idx) or 1))
+    if events is not None:
+        events.put(("begin", len(paths)))
+    done = 0
+
+    def _finish(k: int, rec: Dict[str, Any]):
+        nonlocal done
+        shipped = rec.pop("trace", None)   # 子行程帶回的追蹤事件
+        sink = TRACE_SINK
+        if shipped and sink is not None:
+            for ev in shipped:
+                sink(ev)
+        if state is not None:
+            if k in state.info:
+                rec.setdefault("sha256", state.info[k][2])
+                if rec.get("bytes") is None:
+                    rec["bytes"] = state.info[k][0]
+            state.record(k, paths[k], rec)
+        results[k] = rec
+        done += 1
+        if events is not None:
+            events.put(("file", k, paths[k], rec, done))
+        for j in followers.pop(k, ()):
+            if rec.get("error") == "cancelled":
+                _finish(j, _cancelled_record(paths[j], mode, target))
+            else:
+                _finish(j, _duplicate_record(paths[j], outs[j], paths[k], rec))
+
+    for k, rec in skipped.items():
+        _finish(k, rec)
+
+    if workers == 1:
+        saved_hook = PROGRESS_HOOK
+        try:
+            for k in todo_idx:
+                p, out = paths[k], outs[k]
+                if control is not None and (control.cancelled or control.paused):
+                    try:
+                        control.checkpoint()
+                    except RepairCancelled:
+                        _finish(k, _cancelled_record(p, mode, target))
+                        continue
+                if events is not None:
+                    events.put(("start", k, p))
+
+                def _hook(stage, i=None, total=None, label=None, _k=k):
+                    if events is not None:
+                        events.put(("progress", _k, stage, i, total, label))
+
+                if events is not None or control is not None:
+                    # 進度事件會被合併，檢查點則每次回拋都要跑
+                    set_progress_hook(_hook, control.checkpoint if control is not None else None)
+                else:
+                    set_progress_hook(saved_hook)
+                try:
+                    rec = _batch_worker(str(p), mode, target, str(out))
+                except RepairCancelled:
+                    # 中途取消：移除寫到一半的輸出
+                    with contextlib.suppress(OSError):
+                        out.unlink()
+                    rec = _cancelled_record(p, mode, target)
+                _finish(k, rec)
+        finally:
+            set_progress_hook(saved_hook)
+    else:
+        # 行程池只在多檔時才需要，延後 import 以免拖慢單檔/命令列的啟動
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+        todo = ((k, (paths[k], outs[k])) for k in todo_idx)
+        pending = {}
+        exhausted = False
+        cancel_event = multiprocessing.Event()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_pool_init, initargs=(cancel_event,)) as pool:
+            while True:
+                # 送進行程池的檔案會立刻被搬進呼叫佇列、無法再 Future.cancel()：
+                # 同時最多 workers 個，取消時其餘檔案都還沒送出；已送出的靠 cancel_event 在子行程內停下
+                while not exhausted and len(pending) < workers and \
+                        not (control is not None and (control.paused or control.cancelled)):
+                    item = next(todo, None)
+                    if item is None:
+                        exhausted = True
+                        break
+                    k, (p, out) = item
+                    pending[pool.submit(_batch_worker, str(p), mode, target, str(out), TRACE_SINK is not None)] = k
+                if control is not None and control.cancelled:
+                    cancel_event.set()
+                    for fut in [f for f in pending if f.cancel()]:
+                        k = pending.pop(fut)
+                        _finish(k, _cancelled_record(paths[k], mode, target))
+                if not pending:
+                    if exhausted or (control is not None and control.cancelled):
+                        break
+                    control.wait_running(0.1)
+                    continue
+                finished, _ = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    k = pending.pop(fut)
+                    try:
+                        rec = fut.result()
+                    except Exception as e:
+                        rec = _error_record(paths[k], mode, target, f"[ERROR] 例外：{paths[k]} -> {e}", str(e))
+                    _finish(k, rec)
+    for k, rec in enumerate(results):
+        if rec is None:
+            _finish(k, _cancelled_record(paths[k], mode, target))
+    if state is not None:
+        state.save()
+    if events is not None:
+        events.put(("end", len(paths)))
+    return results
+
+def summarize_results(results: List[str]) -> Tuple[List[str], List[str], List[str]]:
+    ok_list = [r for r in results if r.startswith("[OK]")]
+    copy_list = [r for r in results if r.startswith("[COPY]")]
+    err_list = [r for r in results if r.startswith("[ERROR]")]
+    return ok_list, copy_list, err_list
+
+# ---------- 命令列 / 批次模式（不建立任何 Tk 物件） ----------
+SRC_MODES = ["auto", "zh-simp", "zh-trad", "ja", "en"]
+TARGET_CODES = ["none", "zh-CN", "zh-TW", "en", "ja"]
+
+def _is_fixed_output(p: Path) -> bool:
+    # 先前執行留下的 xxx_fixed / xxx_fixed_N
+    stem = p.stem
+    if stem.endswith("_fixed"):
+        return True
+    head, _, tail = stem.rpartition("_fixed_")
+    return bool(head) and tail.isdigit()
+
+def collect_inputs(inputs: Iterable[str], recursive: bool = False, include: Iterable[str] = (),
+                   exclude: Iterable[str] = (), types: Iterable[str] = ("text", "xlsx", "docx"),
+                   include_fixed: bool = False) -> List[Path]:
+    """展開命令列輸入：檔案照收；資料夾依 types 篩選副檔名（-r 遞迴）；含 * ? [ 的字串視為萬用字元。
+    include/exclude 為 glob（比對檔名或路徑尾端），資料夾與萬用字元展開的結果預設略過 *_fixed 輸出"""
+    exts = set().union(*(TYPE_EXTS[t] for t in types))
+    include, exclude = list(include), list(exclude)
+    seen: Set[Path] = set()
+    found: List[Path] = []
+
+    def _add(p: Path, expanded: bool):
+        if p in seen or any(p.match(pat) for pat in exclude):
             return
-        # 清空，確保進度條在最上方
-        self.result.delete("1.0", tk.END)
-
-        results = []
-        for f in files:
-            p = Path(f)
-            # Hook：解碼/翻譯共用同一條
-            # 檔案處理迴圈內（for f in files: 的上方/內部都可），用這個覆蓋你原本的 _hook
-            self._overall_base = 0  # 已完成的子階段累積（0~99）
-            self._seg_total = 1  # 當前子階段總步數
-            self._seg_weight = 0  # 當前子階段配重
-            self._current_seg_label = ""
+        if expanded:
+            if p.name == MANIFEST_NAME:
+                return
+            if include and not any(p.match(pat) for pat in include):
+                return
+            if not include_fixed and _is_fixed_output(p):
+                return
+        seen.add(p)
+        found.append(p)
+
+    for item in inputs:
+        p = Path(item)
+        if p.is_dir():
+            walker = p.rglob("*") if recursive else p.iterdir()
+            for f in sorted(walker):
+                if f.is_file() and f.suffix.lower() in exts:
+                    _add(f, True)
+        elif any(c in item for c in "*?["):
+            for m in sorted(glob.glob(item, recursive=recursive)):
+                if os.path.isfile(m):
+                    _add(Path(m), True)
+        else:
+            _add(p, False)   # 明確指定的檔案（不存在時交給處理流程回報錯誤）
+    return found
+
+def run_cli(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog=Path(sys.argv[0]).name,
+        description="文本亂碼修復工具（命令列模式）：輸出為原資料夾的 *_fixed 檔，每個檔案寫一筆 JSONL 紀錄。")
+    parser.add_argument("inputs", nargs="*", help="檔案、資料夾或萬用字元；'-' 表示從 stdin 讀取檔案清單（每行一個）")
+    parser.add_argument("-r", "--recursive", action="store_true", help="遞迴處理子資料夾（萬用字元可用 **）")
+    parser.add_argument("--include", action="append", default=[], metavar="GLOB", help="只收錄符合的檔案（可重複）")
+    parser.add_argument("--exclude", action="append", default=[], metavar="GLOB", help="排除符合的檔案（可重複）")
+    parser.add_argument("--types", default="text,xlsx,docx", help="資料夾展開時收錄的類型（預設 text,xlsx,docx）")
+    parser.add_argument("--include-fixed", action="store_true", help="展開資料夾時不略過先前產生的 *_fixed 檔")
+    parser.add_argument("--src", default="auto", choices=SRC_MODES, help="來源語言模式（預設 auto）")
+    parser.add_argument("--target", default="none", choices=TARGET_CODES, help="目標語言（預設 none = 不翻譯）")
+    parser.add_argument("-j", "--workers", type=int, default=BATCH_WORKERS, help=f"平行行程數（預設 {BATCH_WORKERS}）")
+    parser.add_argument("--report", default="-", metavar="PATH", help="JSONL 報告輸出位置（預設 stdout）")
+    parser.add_argument("--incremental", action="store_true",
+                        help=f"增量模式：依各資料夾的 {MANIFEST_NAME} 略過內容未變的檔案（status skip），"
+                             "內容變更時覆寫上次的輸出；同批內容相同的檔案只處理一次")
+    parser.add_argument("--translation-cache", metavar="PATH",
+                        help=f"翻譯快取 SQLite 檔位置；off 停用（預設讀 {TRANSLATE_CACHE_ENV} 或使用者快取資料夾）")
+    parser.add_argument("--translate-concurrency", type=int, metavar="N",
+                        help=f"每個行程同時送出的翻譯請求數（預設 {TRANSLATE_CONCURRENCY}）")
+    parser.add_argument("--translate-rate", type=float, metavar="RPS",
+                        help=f"每個行程每秒最多翻譯請求數，0 = 不限（預設 {TRANSLATE_RATE:g}）")
+    parser.add_argument("--xlsx-streaming", action="store_true",
+                        help=f"{XLSX_STREAM_THRESHOLD_BYTES // (1024 * 1024)} MB 以上的 .xlsx 改以串流處理，省記憶體但"
+                             f"不保留樣式、欄寬、合併儲存格與超連結（也可用環境變數 {XLSX_STREAMING_ENV}=1）")
+    parser.add_argument("--serve", nargs="?", const="-", metavar="SOCKET",
+                        help="常駐服務模式：以 JSON-RPC（一行一則）提供 process_one / decode_bytes_best / translate_text；"
+                             "不給值為 stdin/stdout，給路徑則監聽該 Unix socket。-j 大於 1 時 process_one 交給常駐行程池")
+    parser.add_argument("--trace", metavar="PATH",
+                        help=f"寫出 Chrome trace JSON（ui.perfetto.dev 可開）並在 stderr 印各階段摘要；也可用環境變數 {TRACE_ENV}")
+    args = parser.parse_args(argv)
+    if args.translate_concurrency is not None or args.translate_rate is not None:
+        configure_translation_pool(args.translate_concurrency, args.translate_rate)
+    if args.translation_cache is not None:
+        off = args.translation_cache.strip().lower() in ("", "0", "off", "none", "false")
+        configure_translation_cache(None if off else Path(args.translation_cache).expanduser())
+    if args.xlsx_streaming:
+        configure_xlsx_streaming(True)
+    if XLSX_STREAMING:
+        print(f"注意：{XLSX_STREAM_THRESHOLD_BYTES // (1024 * 1024)} MB 以上的 .xlsx 將以串流輸出，"
+              "不保留樣式、欄寬、合併儲存格與超連結", file=sys.stderr)
+    if args.serve is not None:
+        recorder = enable_tracing(args.trace)
+        try:
+            return serve(args.serve, args.workers)
+        finally:
+            finish_tracing(recorder)
+    if not args.inputs:
+        parser.error("至少需要一個輸入（或使用 --serve）")
+
+    types = [t.strip() for t in args.types.split(",") if t.strip()]
+    unknown = [t for t in types if t not in TYPE_EXTS]
+    if unknown:
+        parser.error(f"未知的類型：{', '.join(unknown)}（可用：{', '.join(TYPE_EXTS)}）")
+    items: List[str] = []
+    for item in args.inputs:
+        if item == "-":
+            items.extend(line.strip() for line in sys.stdin if line.strip())
+        else:
+            items.append(item)
+    paths = collect_inputs(items, args.recursive, args.include, args.exclude, types, args.include_fixed)
+    if not paths:
+        print("沒有符合條件的檔案", file=sys.stderr)
+        return 0
+
+    recorder = enable_tracing(args.trace)
+    report = sys.stdout if args.report == "-" else open(args.report, "a", encoding="utf-8")
+    events = queue.Queue()
+    control = BatchControl()
+    box: List[List[Dict[str, Any]]] = []
+    worker = threading.Thread(
+        target=lambda: box.append(run_batch(paths, args.src, args.target, args.workers, events, control,
+                                            incremental=args.incremental)),
+        daemon=True)
+    worker.start()
+
+    def _report(ev):
+        if ev[0] == "file":
+            report.write(json.dumps(ev[3], ensure_ascii=False) + "\n")
+            report.flush()
+
+    try:
+        # 每完成一檔就寫一行，排程系統可即時追蹤
+        while worker.is_alive() or not events.empty():
+            try:
+                ev = events.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            _report(ev)
+    except KeyboardInterrupt:
+        control.cancel()
+        worker.join()
+        # 中斷到批次收尾之間完成（或標為已取消）的檔案也要寫進報告
+        while not events.empty():
+            _report(events.get_nowait())
+    finally:
+        if report is not sys.stdout:
+            report.close()
+    finish_tracing(recorder)
+    records = box[0] if box else []
+    ok_list, copy_list, err_list = summarize_results([r["message"] for r in records])
+    skip_note = f" | SKIP {sum(r['status'] == 'skip' for r in records)}" if args.incremental else ""
+    print(f"OK {len(ok_list)} | COPY {len(copy_list)}{skip_note} | ERROR {len(err_list)}", file=sys.stderr)
+    return 1 if err_list or len(records) < len(paths) else 0
+
+# ---------- 常駐服務（JSON-RPC 2.0，一行一則訊息） ----------
+# 轉換器、快取與行程池在請求之間保持暖機；bytes 一律以 base64 字串傳遞
+RPC_PARSE_ERROR, RPC_INVALID_REQUEST, RPC_METHOD_NOT_FOUND, RPC_INVALID_PARAMS, RPC_SERVER_ERROR = \
+    -32700, -32600, -32601, -32602, -32000
+
+class RpcError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+
+def _param(params: Dict[str, Any], name: str, kind, default: Any = _MISSING, choices=None):
+    value = params.get(name, default)
+    if value is _MISSING:
+        raise RpcError(RPC_INVALID_PARAMS, f"缺少參數：{name}")
+    if not isinstance(value, kind) or (choices is not None and value not in choices):
+        raise RpcError(RPC_INVALID_PARAMS, f"參數不正確：{name}={value!r}")
+    return value
+
+def _payload(params: Dict[str, Any]) -> bytes:
+    """"data"（base64）或 "path"（服務端可讀的檔案）"""
+    if "data" in params:
+        try:
+            return base64.b64decode(_param(params, "data", str), validate=True)
+        except ValueError as e:
+            raise RpcError(RPC_INVALID_PARAMS, f"data 不是合法的 base64：{e}")
+    return Path(_param(params, "path", str)).read_bytes()
+
+class _RpcConnection:
+    """一條連線（stdin/stdout 或 socket）：一行一則 JSON；行程池的回應會從其他執行緒寫出，寫入時加鎖"""
+    def __init__(self, rfile, wfile):
+        self.rfile, self.wfile = rfile, wfile
+        self._lock = threading.Lock()
+
+    def send(self, obj: Dict[str, Any]):
+        line = (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            try:
+                self.wfile.write(line)
+                self.wfile.flush()
+            except (OSError, ValueError):
+                pass   # 用戶端已斷線
+
+    def reply(self, rid: Any, result: Any = None, error: Optional[RpcError] = None):
+        if rid is None:
+            return   # 通知（notification）不回應
+        msg: Dict[str, Any] = {"jsonrpc": "2.0", "id": rid}
+        if error is not None:
+            msg["error"] = {"code": error.code, "message": str(error)}
+        else:
+            msg["result"] = result
+        self.send(msg)
+
+    def notify(self, method: str, params: Dict[str, Any]):
+        self.send({"jsonrpc": "2.0", "method": method, "params": params})
+
+_PENDING = object()   # 回應稍後由行程池的回呼送出
+
+class RepairService:
+    """常駐修復服務。行程內的請求一次只跑一個（進度回拋與追蹤都是全域狀態）；
+    workers > 1 時 process_one 改交給常駐行程池並行處理（要求 progress 的請求仍在行程內執行）"""
+    def __init__(self, workers: int = 1):
+        self.workers = max(1, workers)
+        self.pool = None
+        self.started = time.time()
+        self.requests = 0
+        self.stopping = threading.Event()
+        self.on_shutdown: Optional[Callable[[], None]] = None
+        self._lock = threading.Lock()
+        self._names_lock = threading.Lock()
+        self._reserved: Set[Path] = set()   # 已分配、尚未完成的輸出名稱
+        self.methods = {"process_one": self.process_one, "decode_bytes_best": self.decode_bytes_best,
+                        "translate_text": self.translate_text, "stats": self.stats, "shutdown": self.shutdown}
+
+    def warm_up(self):
+        """先載入選用套件與 OpenCC 字典，之後的請求不必再付這些成本；行程池在暖機後才 fork，子行程直接沿用"""
+        get_openpyxl()
+        get_docx()
+        for config in ("t2s", "s2t"):
+            conv = get_opencc_converter(config)
+            if conv is not None:
+                conv("")
+        if self.workers > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            self.pool = ProcessPoolExecutor(max_workers=self.workers)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+            self.pool = None
+
+    def serve_connection(self, conn: _RpcConnection):
+        conn.notify("ready", {"methods": sorted(self.methods), "workers": self.workers, "pid": os.getpid()})
+        for line in conn.rfile:
+            if line.strip():
+                self.dispatch(line, conn)
+            if self.stopping.is_set():
+                break
+
+    def dispatch(self, line: bytes, conn: _RpcConnection):
+        try:
+            msg = json.loads(line)
+        except ValueError as e:
+            # 解析失敗時拿不到 id，依規範以 id: null 回應
+            conn.send({"jsonrpc": "2.0", "id": None, "error": {"code": RPC_PARSE_ERROR, "message": f"JSON 解析失敗：{e}"}})
+            return
+        rid = msg.get("id") if isinstance(msg, dict) else None
+        self.requests += 1
+        try:
+            if not isinstance(msg, dict) or not isinstance(msg.get("method"), str):
+                raise RpcError(RPC_INVALID_REQUEST, "不是合法的 JSON-RPC 請求")
+            method = self.methods.get(msg["method"])
+            if method is None:
+                raise RpcError(RPC_METHOD_NOT_FOUND, f"沒有這個方法：{msg['method']}")
+            params = msg.get("params", {})
+            if not isinstance(params, dict):
+                raise RpcError(RPC_INVALID_PARAMS, "params 必須是物件")
+            result = method(params, rid, conn)
+        except RpcError as e:
+            conn.reply(rid, error=e)
+            return
+        except Exception as e:
+            conn.reply(rid, error=RpcError(RPC_SERVER_ERROR, f"{type(e).__name__}: {e}"))
+            return
+        if result is not _PENDING:
+            conn.reply(rid, result)
+
+    @contextlib.contextmanager
+    def _in_process(self, rid: Any, conn: _RpcConnection, progress: bool):
+        """行程內執行：持鎖；progress 為真時把進度以 "progress" 通知送回（已合併到 PROGRESS_MAX_HZ）"""
+        with self._lock:
+            saved = PROGRESS_HOOK
+            if progress:
+                set_progress_hook(lambda stage, **kw: conn.notify("progress", dict(kw, id=rid, stage=stage)))
+            else:
+                set_progress_hook(None)
+            try:
+                yield
+            finally:
+                set_progress_hook(saved)
+
+    def _allocate(self, path: Path, mode: str, out: Optional[str]) -> Path:
+        if out:
+            return Path(out)
+        with self._names_lock:
+            return build_fixed_name(path, mode, self._reserved)
+
+    def _release(self, out: Path):
+        with self._names_lock:
+            self._reserved.discard(out)
+
+    def process_one(self, params: Dict[str, Any], rid: Any, conn: _RpcConnection):
+        """{"path", "mode", "target", "output"?} 處理服務端的檔案，回傳 process_one_record 的紀錄；
+        或 {"data"（base64）, "name"} 處理上傳內容，紀錄另附輸出內容 "data"（base64）"""
+        mode = _param(params, "mode", str, "auto", SRC_MODES)
+        target = _param(params, "target", str, "none", TARGET_CODES)
+        progress = bool(params.get("progress"))
+        tmp = None
+        if "data" in params:
+            name = Path(_param(params, "name", str)).name or "input.txt"
+            data = _payload(params)   # 先驗證 base64，不合法時不留下暫存資料夾
+            try:
+                tmp = Path(tempfile.mkdtemp(prefix="textfix-"))
+                path = tmp / name
+                path.write_bytes(data)
+            except OSError as e:
+                if tmp is not None:
+                    shutil.rmtree(tmp, ignore_errors=True)
+                raise RpcError(RPC_SERVER_ERROR, f"無法暫存上傳內容：{e.strerror or type(e).__name__}")
+            out = tmp / f"out{path.suffix}"
+        else:
+            path = Path(_param(params, "path", str))
+            out = self._allocate(path, mode, _param(params, "output", str, ""))
+
+        def _done(rec: Dict[str, Any]) -> Dict[str, Any]:
+            rec.pop("trace", None)
+            if tmp is not None:
+                try:
+                    if rec.get("output"):
+                        try:
+                            rec["data"] = base64.b64encode(Path(rec["output"]).read_bytes()).decode("ascii")
+                        except OSError as e:
+                            reason = e.strerror or type(e).__name__
+                            rec.update(status="error", error=reason, message=f"[ERROR] 無法讀取輸出：{reason}")
+                    rec.update(path=name, output=None)
+                    # 訊息裡不帶服務端的暫存路徑
+                    for key in ("message", "error"):
+                        if rec.get(key):
+                            rec[key] = rec[key].replace(str(tmp) + os.sep, "")
+                finally:
+                    shutil.rmtree(tmp, ignore_errors=True)
+            else:
+                self._release(out)
+            return rec
+
+        if self.pool is not None and not progress:
+            def _callback(fut):
+                try:
+                    rec = fut.result()
+                except Exception as e:
+                    rec = _error_record(path, mode, target, f"[ERROR] 例外：{path} -> {e}", str(e))
+                conn.reply(rid, _done(rec))
+            try:
+                fut = self.pool.submit(_batch_worker, str(path), mode, target, str(out))
+            except Exception:
+                _done({})
+                raise
+            fut.add_done_callback(_callback)
+            return _PENDING
+        try:
+            with self._in_process(rid, conn, progress):
+                rec = process_one_record(path, mode, target, out)
+        except BaseException:
+            _done({})
+            raise
+        return _done(rec)
+
+    def decode_bytes_best(self, params: Dict[str, Any], rid: Any, conn: _RpcConnection):
+        """{"data"（base64）或 "path", "mode"} -> {"text", "tag", "plan", "confidence"}"""
+        mode = _param(params, "mode", str, "auto", SRC_MODES)
+        b = _payload(params)
+        with self._in_process(rid, conn, bool(params.get("progress"))):
+            r = decode_bytes_detail(b, mode)
+        return {"text": r.text, "tag": r.tag, "plan": list(r.plan), "confidence": r.confidence}
+
+    def translate_text(self, params: Dict[str, Any], rid: Any, conn: _RpcConnection):
+        """{"text", "target", "mode"} -> {"text"}"""
+        text = _param(params, "text", str)
+        target = _param(params, "target", str, choices=TARGET_CODES)
+        mode = _param(params, "mode", str, "auto", SRC_MODES)
+        with self._in_process(rid, conn, bool(params.get("progress"))):
+            return {"text": translate_text(text, target, mode)}
+
+    def stats(self, params: Dict[str, Any], rid: Any, conn: _RpcConnection):
+        return {"uptime": round(time.time() - self.started, 3), "requests": self.requests,
+                "workers": self.workers, "pid": os.getpid(), "caches": cache_stats()}
+
+    def shutdown(self, params: Dict[str, Any], rid: Any, conn: _RpcConnection):
+        self.stopping.set()
+        if self.on_shutdown is not None:
+            # socketserver 的 shutdown 會等 serve_forever 結束，不能在處理請求的執行緒裡同步等
+            threading.Thread(target=self.on_shutdown, daemon=True).start()
+        return True
+
+def serve(where: str = "-", workers: int = 1) -> int:
+    """where 為 "-" 時走 stdin/stdout，否則視為 Unix socket 路徑（每條連線一個執行緒，共用同一個服務）"""
+    service = RepairService(workers)
+    service.warm_up()
+    try:
+        if where == "-":
+            # stdout 專供協定使用：其他 print 一律改到 stderr，免得混進回應
+            out = sys.stdout.buffer
+            sys.stdout = sys.stderr
+            service.serve_connection(_RpcConnection(sys.stdin.buffer, out))
+            return 0
+        import socketserver
+        if not hasattr(socketserver, "UnixStreamServer"):
+            print("此平台不支援 Unix socket，請改用 --serve（stdin/stdout）", file=sys.stderr)
+            return 2
+
+        class _Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                service.serve_connection(_RpcConnection(self.rfile, self.wfile))
+
+        class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+            daemon_threads = True
+
+        sock = Path(where)
+        if sock.is_socket():
+            sock.unlink()   # 上次沒有正常結束留下的 socket 檔
+        with _Server(str(sock), _Handler) as server:
+            os.chmod(sock, 0o600)
+            service.on_shutdown = server.shutdown
+            print(f"listening on {sock}", file=sys.stderr)
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+        with contextlib.suppress(OSError):
+            sock.unlink()
+        return 0
+    finally:
+        service.close()
+
+# ---------- GUI ----------
+@functools.lru_cache(maxsize=None)
+def gui_app_class():
+    """建立 GUI 類別：tkinter 只在真的要開視窗時才 import（命令列/子行程不需要）"""
+    import tkinter as tk
+    from tkinter import filedialog, ttk
+
+    class App(tk.Tk):
+        def __init__(self):
+            super().__init__()
+            self.title("文本亂碼修復工具（v4.1_20250819）")
+            self.geometry("760x420")
+            self.minsize(560, 300)
+            self.resizable(True, True)
+            # 置中容器：把上方的兩個下拉與按鈕都裝進來
+            controls = tk.Frame(self)
+            controls.grid(row=0, column=0, columnspan=2, pady=(12, 6), sticky="n")  # 不拉伸，居中
+            controls.grid_columnconfigure(0, weight=0)
+            controls.grid_columnconfigure(1, weight=0)
+            self._prog_started = False  # 單檔只啟動一次進度列
+            self._prog_tag_name = "PROG_LINE"   # Text tag 名稱（用 tag 取代 mark）
+            # 進度配重（預設只有解碼，保留 1% 給收尾寫檔）
+            self._phase_weights = {"解碼檢測": 99, "中文轉換": 0, "翻譯載入": 0}
+
+            # 來源語言
+            self.src_lang_var = tk.StringVar(value="自動")
+            tk.Label(controls, text="來源語言：").grid(row=0, column=0, sticky="e", padx=(0, 6))
+            ttk.Combobox(controls, textvariable=self.src_lang_var,
+                         values=["自動", "簡體中文", "繁體中文", "日文", "英文"],
+                         state="readonly", width=28).grid(row=0, column=1, sticky="w")
+
+            # 目標語言
+            self.tgt_lang_var = tk.StringVar(value="不翻譯")
+            tk.Label(controls, text="目標語言：").grid(row=1, column=0, sticky="e", padx=(0, 6))
+            ttk.Combobox(controls, textvariable=self.tgt_lang_var,
+                         values=["不翻譯", "簡體中文", "繁體中文", "英文", "日文"],
+                         state="readonly", width=28).grid(row=1, column=1, sticky="w")
+
+            # 翻譯快取：原文與譯文會以明文寫進使用者快取資料夾，GUI 預設不啟用；
+            # 環境變數 TEXTFIX_TRANSLATION_CACHE 指定了位置時視為已同意
+            explicit = os.environ.get(TRANSLATE_CACHE_ENV)
+            self._cache_path = (default_translation_cache_path() if explicit else None) or user_translation_cache_path()
+            self.cache_var = tk.BooleanVar(value=bool(explicit) and default_translation_cache_path() is not None)
+            configure_translation_cache(self._cache_path if self.cache_var.get() else None)
+            self.cache_chk = tk.Checkbutton(controls, text="翻譯結果快取到磁碟（明文保存，重跑較快）",
+                                            variable=self.cache_var, command=self._toggle_cache)
+            self.cache_chk.grid(row=2, column=0, columnspan=2, pady=(8, 0))
+
+            # 按鈕
+            self.run_btn = tk.Button(controls, text="選擇文件並處理", command=self.process_files, width=24)
+            self.run_btn.grid(row=3, column=0, columnspan=2, pady=(12, 4))
+            job_btns = tk.Frame(controls)
+            job_btns.grid(row=4, column=0, columnspan=2, pady=(0, 8))
+            self.pause_btn = tk.Button(job_btns, text="暫停", command=self.toggle_pause, width=10, state="disabled")
+            self.pause_btn.grid(row=0, column=0, padx=4)
+            self.cancel_btn = tk.Button(job_btns, text="取消", command=self.cancel_job, width=10, state="disabled")
+            self.cancel_btn.grid(row=0, column=1, padx=4)
+
+            # 背景工作：worker 執行緒把事件放進 queue，Tk 以 after() 定時取出
+            self._job = None
+            self._job_control = None
+            self.protocol("WM_DELETE_WINDOW", self._on_close)
+
+            # 結果
+            self.result = tk.Text(self, height=10)
+            self.result.grid(row=1, column=0, columnspan=2, padx=10, pady=10, sticky="nsew")
+            self.result.configure(font=("Arial", 10))
+
+            self.grid_rowconfigure(1, weight=1)
+            self.grid_columnconfigure(1, weight=1)
+            self.grid_columnconfigure(1, weight=1)
+
+            # 樣式
+            self.result.tag_configure("HDR", font=("Arial", 10, "bold"))
+            self.result.tag_configure("OK", foreground="#0a7f00")
+            self.result.tag_configure("COPY", foreground="#000000")
+            self.result.tag_configure("ERROR", foreground="#b00020")
+            self.result.tag_configure("MUTED", foreground="#666666")
+
+            # 置前
+            self.lift()
+            self.attributes("-topmost", True)
+            self.after(200, lambda: self.attributes("-topmost", False))
+
+            # 依賴狀態
+            status = []
+            status.append("OpenCC: OK" if dependency_available("opencc") else "OpenCC: 未安裝")
+            status.append("GoogleTranslator: OK" if dependency_available("deep_translator")
+                          else "GoogleTranslator: 未安裝/不可用")
+            tk.Label(self, text=" / ".join(status), fg="#666").grid(row=2, column=0, columnspan=2, pady=(0,8))
+
+        # ====== 文字條進度：用 Text mark 精準覆寫 ======
+        def _ascii_bar(self, pct: int, side: int = 16) -> str:
+            pct = max(0, min(100, int(pct)))
+            filled = max(1, int(round(pct * side / 100)))
+            left  = "|" * filled + " " * (side - filled)
+            right = " " * (side - filled) + "|" * filled
+            return f"{left}{pct:>3d}%{right}"
+
+        def begin_progress(self, label: str = "處理中…"):
+            # 先把舊的進度區間 tag 移除（不存在也沒關係）
+            try:
+                self.result.tag_delete(self._prog_tag_name)
+            except tk.TclError:
+                pass
+            self._prog_label = label
+            self._prog_started = True
+            self._prog_line_created = False
+
+        def update_progress(self, pct: int):
+            tag = self._prog_tag_name
+
+            # 第一次 tick：先插標題行，再插「被 tag 標記」的進度條本體 + 換行
+            if not getattr(self, "_prog_line_created", False):
+                self.result.insert(tk.END, f"{getattr(self, '_prog_label', '處理中…')}\n", "MUTED")
+                self.result.insert(tk.END, self._ascii_bar(pct), (tag, "MUTED"))  # 只給進度條本體加 tag
+                self.result.insert(tk.END, "\n")  # 換行獨立，避免被覆蓋
+                self._prog_line_created = True
+                self.result.see(tk.END)
+                return
+
+            # 後續 tick：精準覆寫「tag 範圍」內容（單行、不新增）
+            ranges = self.result.tag_ranges(tag)
+            if ranges:
+                start, end = ranges[0], ranges[1]
+                self.result.delete(start, end)
+                self.result.insert(start, self._ascii_bar(pct), (tag, "MUTED"))
+                self.result.see(tk.END)
+
+        def end_progress(self, msg: str = "完成"):
+            self.update_progress(100)
+            self.result.insert(tk.END, f"  {msg}\n", "MUTED")
+            # 處理在背景執行緒進行，mainloop 會在空檔重繪，不需要強制 update_idletasks
+            self.result.see(tk.END)
+
+            self._prog_started = False
+            self._prog_line_created = False
+
+        def process_files(self):
+            if self._job is not None:
+                return
+            mode = ui_src_mode(self.src_lang_var.get())
+            target = ui_target_code(self.tgt_lang_var.get())
+
+            files = filedialog.askopenfilenames(
+                title="選擇需要修復的文件",
+                filetypes=[("All Supported", "*.txt *.csv *.tsv *.srt *.ass *.md *.json *.yaml *.yml *.log *.ini *.cfg *.html *.htm *.xml *.xlsx *.docx"),
+                           ("Text", "*.txt *.csv *.tsv *.srt *.ass *.md *.json *.yaml *.yml *.log *.ini *.cfg *.html *.htm *.xml"),
+                           ("Excel", "*.xlsx"),
+                           ("Word", "*.docx"),
+                           ("All files", "*.*")]
+            )
+            if not files:
+                return
+            # 清空，確保進度條在最上方
+            self.result.delete("1.0", tk.END)
+
+            paths = [Path(f) for f in files]
+            # 單檔（或只設 1 個行程）在背景執行緒依序處理，保留各階段的細部進度；多檔交給多行程
+            workers = BATCH_WORKERS if len(paths) > 1 else 1
+            self._job_mode, self._job_target, self._job_paths = mode, target, paths
+            self._job_detailed = workers == 1
+            self._job_events = queue.Queue()
+            self._job_control = BatchControl()
+            self._job_results = None
+            self._set_phase_weights(target)
+
+            def _work(events=self._job_events, control=self._job_control):
+                try:
+                    records = run_batch(paths, mode, target, workers, events, control)
+                    self._job_results = [r["message"] for r in records]
+                except Exception as e:
+                    self._job_results = [f"[ERROR] 例外：{p} -> {e}" for p in paths]
+
+            if not self._job_detailed:
+                self.begin_progress(f"批次處理：{len(paths)} 個檔案（{min(workers, len(paths))} 個行程）")
+            self._job = threading.Thread(target=_work, daemon=True)
+            self._set_running(True)
+            self._job.start()
+            self.after(self._POLL_MS, self._poll_events)
+
+        _POLL_MS = 50
+
+        def _set_running(self, running: bool):
+            self.run_btn.configure(state="disabled" if running else "normal")
+            self.cache_chk.configure(state="disabled" if running else "normal")
+            self.pause_btn.configure(state="normal" if running else "disabled", text="暫停")
+            self.cancel_btn.configure(state="normal" if running else "disabled")
+
+        def _toggle_cache(self):
+            # 只在沒有工作時可切換；寫回環境變數，之後的批次子行程沿用
+            configure_translation_cache(self._cache_path if self.cache_var.get() else None)
+
+        def toggle_pause(self):
+            control = self._job_control
+            if self._job is None or control is None:
+                return
+            if control.paused:
+                control.resume()
+                self.pause_btn.configure(text="暫停")
+            else:
+                # 多行程模式：已在執行中的檔案會做完，之後才停下
+                control.pause()
+                self.pause_btn.configure(text="繼續")
+
+        def cancel_job(self):
+            if self._job is not None and self._job_control is not None:
+                self._job_control.cancel()
+                self.pause_btn.configure(state="disabled", text="暫停")
+                self.cancel_btn.configure(state="disabled")
+
+        def _on_close(self):
+            self.cancel_job()
+            self.destroy()
+
+        def _set_phase_weights(self, target: str):
             # 依當次任務設定子階段配重（總和 ≤ 99）
             if target == "none":
                 # 只做解碼：把 99% 都給解碼，最後 1% 給寫出/收尾
                 self._phase_weights = {"解碼檢測": 99, "中文轉換": 0, "翻譯載入": 0}
-            elif target in ("zh-CN", "zh-TW") and OpenCC:
+            elif target in ("zh-CN", "zh-TW") and dependency_available("opencc"):
                 # 解碼 + 中文內部轉換
                 self._phase_weights = {"解碼檢測": 70, "中文轉換": 29, "翻譯載入": 0}
             else:
                 # 解碼 + 外語翻譯
                 self._phase_weights = {"解碼檢測": 60, "翻譯載入": 39, "中文轉換": 0}
 
-            def _hook(stage, i=None, total=None, label=None, _p=p):
-                if stage == "begin":
-                    if not getattr(self, "_prog_started", False):
-                        self.begin_progress(label or f"處理：{_p.name}")
-                    self._current_seg_label = label or ""
-                    self._seg_total = max(1, total or 1)
-                    # 這個子階段最多只能把總條推進到 99% 之內
-                    # 找不到對應標籤時，用「剩餘配重」當預設，避免卡住
-                    self._seg_weight = self._phase_weights.get(
-                        self._current_seg_label,
-                        max(0, 99 - self._overall_base)
-                    )
-
-                elif stage == "tick":
-                    # 子階段內部進度 → 映射到 [overall_base, overall_base + seg_weight]，最高封頂 99
-                    pct_in_seg = int((i or 0) * 100 / max(1, self._seg_total))
-                    overall = min(99, int(self._overall_base + self._seg_weight * pct_in_seg / 100))
-                    self.update_progress(overall)
-                elif stage == "end":
-                    # 子階段結束，把 base 往前推，但依舊封頂 99（留 1% 給「寫入完成」）
-                    self._overall_base = min(99, self._overall_base + self._seg_weight)
-
-            set_progress_hook(_hook)
+        def _poll_events(self):
+            """Tk 執行緒：取出背景工作累積的事件；同一輪只重畫一次進度條"""
+            pct = None
+            while True:
+                try:
+                    ev = self._job_events.get_nowait()
+                except queue.Empty:
+                    break
+                pct = self._on_event(ev, pct)
+            if pct is not None and self._prog_started:
+                self.update_progress(pct)
+            if self._job.is_alive() or not self._job_events.empty():
+                self.after(self._POLL_MS, self._poll_events)
+                return
+            self._job.join()
+            results = self._job_results or []
+            self._job = None
+            self._set_running(False)
+            self._show_summary(results, self._job_mode, self._job_target)
 
-            try:
-                msg = process_one(p, mode, target)
-            except Exception as e:
-                msg = f"[ERROR] 例外：{f} -> {e}"
-            finally:
-                set_progress_hook(None)
-                if getattr(self, "_prog_started", False):
-                    self.end_progress("完成")
+        def _on_event(self, ev, pct: Optional[int]) -> Optional[int]:
+            """處理單一事件，回傳尚未畫出的進度百分比"""
+            kind = ev[0]
+            if kind == "progress":
+                _, _, stage, i, total, label = ev
+                return self._on_phase(stage, i, total, label, pct)
+            # 進度條要換行/收尾前，先把累積的百分比畫上去
+            if pct is not None and self._prog_started:
+                self.update_progress(pct)
+            pct = None
+            if kind == "start":
+                self.begin_progress(f"處理：{ev[2].name}")
+                # Hook：解碼/翻譯共用同一條
+                self._overall_base = 0  # 已完成的子階段累積（0~99）
+                self._seg_total = 1  # 當前子階段總步數
+                self._seg_weight = 0  # 當前子階段配重
+                self._current_seg_label = ""
+            elif kind == "file":
+                _, _, _, rec, done = ev
+                msg = rec["message"]
+                print(msg)
+                if self._job_detailed:
+                    if self._prog_started:
+                        self.end_progress("已取消" if msg.startswith("[ERROR] 已取消") else "完成")
+                else:
+                    pct = min(99, int(done * 100 / max(1, len(self._job_paths))))
+            elif kind == "end":
+                if self._prog_started:
+                    self.end_progress("已取消" if self._job_control.cancelled else "完成")
+            return pct
 
-            print(msg)
-            results.append(msg)
+        def _on_phase(self, stage, i, total, label, pct: Optional[int]) -> Optional[int]:
+            if stage == "begin":
+                self._current_seg_label = label or ""
+                self._seg_total = max(1, total or 1)
+                # 這個子階段最多只能把總條推進到 99% 之內
+                # 找不到對應標籤時，用「剩餘配重」當預設，避免卡住
+                self._seg_weight = self._phase_weights.get(
+                    self._current_seg_label,
+                    max(0, 99 - self._overall_base)
+                )
+            elif stage == "tick":
+                # 子階段內部進度 → 映射到 [overall_base, overall_base + seg_weight]，最高封頂 99
+                pct_in_seg = int((i or 0) * 100 / max(1, self._seg_total))
+                return min(99, int(self._overall_base + self._seg_weight * pct_in_seg / 100))
+            elif stage == "end":
+                # 子階段結束，把 base 往前推，但依舊封頂 99（留 1% 給「寫入完成」）
+                self._overall_base = min(99, self._overall_base + self._seg_weight)
+            return pct
 
-        # --- UX 輸出 ---
-        ok_list = [r for r in results if r.startswith("[OK]")]
-        copy_list = [r for r in results if r.startswith("[COPY]")]
-        err_list = [r for r in results if r.startswith("[ERROR]")]
-        summary_line = (f"✅ 成功 {len(ok_list)}"
-                        f"   | 📄 複製 {len(copy_list)}"
-                        f"   | ❌ 失敗 {len(err_list)}")
+        def _show_summary(self, results: List[str], mode: str, target: str):
+            # --- UX 輸出 ---
+            ok_list, copy_list, err_list = summarize_results(results)
+            summary_line = (f"✅ 成功 {len(ok_list)}"
+                            f"   | 📄 複製 {len(copy_list)}"
+                            f"   | ❌ 失敗 {len(err_list)}")
 
-        self.result.insert(tk.END, summary_line + "\n", "HDR")
-        self.result.insert(tk.END, f"來源模式={mode}, 目標語言={target}\n\n", "MUTED")
+            self.result.insert(tk.END, summary_line + "\n", "HDR")
+            self.result.insert(tk.END, f"來源模式={mode}, 目標語言={target}\n\n", "MUTED")
 
-        def dump_block(title_emoji, title, lines, tag):
-            if not lines:
-                return
-            self.result.insert(tk.END, f"{title_emoji} {title}（{len(lines)}）\n", "HDR")
-            for line in lines[:8]:
-                self.result.insert(tk.END, "  • " + line + "\n", tag)
-            if len(lines) > 8:
-                self.result.insert(tk.END, f"  … 還有 {len(lines) - 8} 條\n", "MUTED")
-            self.result.insert(tk.END, "\n")
+            def dump_block(title_emoji, title, lines, tag):
+                if not lines:
+                    return
+                self.result.insert(tk.END, f"{title_emoji} {title}（{len(lines)}）\n", "HDR")
+                for line in lines[:8]:
+                    self.result.insert(tk.END, "  • " + line + "\n", tag)
+                if len(lines) > 8:
+                    self.result.insert(tk.END, f"  … 還有 {len(lines) - 8} 條\n", "MUTED")
+                self.result.insert(tk.END, "\n")
+
+            dump_block("✅", "修復完成", ok_list, "OK")
+            dump_block("📄", "僅複製（無內容變更/不支援副檔名）", copy_list, "COPY")
+            dump_block("❌", "處理失敗", err_list, "ERROR")
+
+    return App
+
+def __getattr__(name: str):
+    # 保留「模組.App」的用法，同時不在 import 時載入 tkinter
+    if name == "App":
+        return gui_app_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """有參數走命令列模式；沒有參數開 GUI"""
+    argv = sys.argv[1:] if argv is None else argv
+    if argv:
+        return run_cli(argv)
+    print(start_time)
+    print("======================================")
+    recorder = enable_tracing()
+    gui_app_class()().mainloop()
+    finish_tracing(recorder)
 
-        dump_block("✅", "修復完成", ok_list, "OK")
-        dump_block("📄", "僅複製（無內容變更/不支援副檔名）", copy_list, "COPY")
-        dump_block("❌", "處理失敗", err_list, "ERROR")
+    print("======================================")
+    print("ok!!")
+    end_time = time.time()
+    print(end_time)
+    duration = end_time - start_time
+    print(f"程式執行時間為 {duration:.2f} 秒")
+    return 0
 
 if __name__ == "__main__":
-    App().mainloop()
-
-print("======================================")
-print("ok!!")
-end_time = time.time()
-print(end_time)
-duration = end_time - start_time
-print(f"程式執行時間為 {duration:.2f} 秒")
+    # 打包成 .exe 時，多行程批次需要這行；啟動訊息放在 main()，子行程重新載入模組時才不會重印
+    import multiprocessing
+    multiprocessing.freeze_support()
+    sys.exit(main())